@@ -1,15 +1,42 @@
 import sys
+import os
 from PyQt5.QtWidgets import (QApplication, QLabel, QVBoxLayout, QHBoxLayout, QPushButton, QWidget, QRadioButton, QFileDialog, QMessageBox, QGroupBox)
 from PyQt5.QtGui import QPixmap, QPainter, QColor
-from PyQt5.QtCore import Qt, QRect
-from PIL import Image
+from PyQt5.QtCore import Qt, QRect, QThread, pyqtSignal
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from stegotools.bitplanes import PlaneCache, PlaneSet, load_pixels, plane_to_image
+from stegotools.qtimage import packed_plane_to_qimage, scaled_pixmap
+
+class PlaneWorker(QThread):
+    # Фоновое вычисление всех битовых плоскостей изображения и пирамиды для отображения
+    planes_ready = pyqtSignal(object, object)
+    planes_failed = pyqtSignal(object, str)
+
+    def __init__(self, key, path, parent=None):
+        super().__init__(parent)
+        self.key = key
+        self.path = path
+
+    def run(self):
+        try:
+            self.planes_ready.emit(self.key, PlaneSet(load_pixels(self.path)))
+        except Exception as e:
+            self.planes_failed.emit(self.key, str(e))
+
+
 
 class BitImageVisualizer(QWidget):
     def __init__(self):
         super().__init__()
         self.selected_image_path = None
         self.selected_bit = 0
-        self.changed_image = None
+        self.plane_cache = PlaneCache()
+        self.plane_key = None
+        self.plane_set = None
+        self.plane_workers = {}
+        self.show_planes = False
+        self.changed_bit = None
         self.initUI()
 
 
@@ -147,6 +174,9 @@ class BitImageVisualizer(QWidget):
         if file_path:
             self.selected_image_path = file_path
             self.display_image(file_path)
+            self.load_planes(file_path)
+            if self.show_planes:
+                self.show_selected_plane()
 
 
 
@@ -163,6 +193,41 @@ class BitImageVisualizer(QWidget):
                 self.selected_bit = i
                 break
         self.update_bit_visualization()
+        if self.show_planes:
+            self.show_selected_plane()
+
+
+
+    def load_planes(self, path):
+        # Плоскости берутся из кэша, иначе считаются в фоне (результат придет в on_planes_ready)
+        key = PlaneCache.key(path)
+        self.plane_key = key
+        self.plane_set = self.plane_cache.get(key)
+        if self.plane_set is not None or key in self.plane_workers:
+            return
+
+        worker = PlaneWorker(key, path, self)
+        worker.planes_ready.connect(self.on_planes_ready)
+        worker.planes_failed.connect(self.on_planes_failed)
+        worker.finished.connect(lambda: self.plane_workers.pop(key, None))
+        worker.finished.connect(worker.deleteLater)
+        self.plane_workers[key] = worker
+        worker.start()
+
+
+
+    def on_planes_ready(self, key, plane_set):
+        self.plane_cache.put(key, plane_set)
+        if key == self.plane_key:
+            self.plane_set = plane_set
+            if self.show_planes:
+                self.show_selected_plane()
+
+
+
+    def on_planes_failed(self, key, message):
+        if key == self.plane_key:
+            QMessageBox.warning(self, "Ошибка", f"Не удалось обработать изображение: {message}")
 
 
 
@@ -171,31 +236,33 @@ class BitImageVisualizer(QWidget):
             QMessageBox.warning(self, "Ошибка", "Сначала выберите изображение!")
             return
 
-        img = Image.open(self.selected_image_path)
-        width, height = img.size
-        new_image = Image.new("1", (width, height))
+        # файл мог измениться с момента выбора - тогда ключ кэша другой
+        self.load_planes(self.selected_image_path)
+        self.show_planes = True
+        self.show_selected_plane()
+
 
-        for x in range(width):
-            for y in range(height):
-                pixel = img.getpixel((x, y))
-                lsb = (pixel >> self.selected_bit) & 1
-                new_image.putpixel((x, y), 255 if lsb == 1 else 0)
 
-        self.changed_image = new_image
-        self.display_changed_image(new_image)
+    def show_selected_plane(self):
+        if self.plane_set is None:
+            self.changed_image_label.setText("Вычисление битовых плоскостей...")
+            return
+
+        (height, width), packed = self.plane_set.display_plane(self.selected_bit)
+        self.changed_bit = self.selected_bit
+        self.display_changed_image(packed_plane_to_qimage(packed, width))
 
 
 
     def display_changed_image(self, image):
-        image.save("temp_changed_image.bmp", "BMP")
-        pixmap = QPixmap("temp_changed_image.bmp").scaled(300, 300, aspectRatioMode=True)
+        pixmap = scaled_pixmap(image)
         self.changed_image_display.setPixmap(pixmap)
         self.changed_image_label.setText("")
 
 
 
     def save_image(self):
-        if self.changed_image is None:
+        if self.plane_set is None or self.changed_bit is None:
             QMessageBox.warning(self, "Ошибка", "Сначала сгенерируйте изображение!")
             return
 
@@ -203,8 +270,8 @@ class BitImageVisualizer(QWidget):
         if not output_folder:
             return
 
-        output_path = f"{output_folder}/bit_{self.selected_bit}.bmp"
-        self.changed_image.save(output_path, "BMP")
+        output_path = f"{output_folder}/bit_{self.changed_bit}.bmp"
+        plane_to_image(self.plane_set.plane(self.changed_bit)).save(output_path, "BMP")
         QMessageBox.information(self, "Успех", f"Изображение сохранено: {output_path}")
 
 
@@ -0,0 +1,218 @@
+from itertools import chain
+
+import numpy as np
+
+# Цифровой водяной знак методом CDB в синем канале.
+# Работает с массивом пикселей (высота, ширина, RGB) и совпадает побитово с прежней
+# реализацией на QImage: координаты берутся из того же потока RandomState(seed)
+# (x, затем y для каждого бита), а синий канал округляется так же, как через QColor
+# (16-битные компоненты, затем 8 бит).
+
+RAW_CHUNK = 1 << 14
+DEFAULT_SEED = 0xAAAA
+FEISTEL_ROUNDS = 4
+
+
+def _range_mask(rng: int) -> int:
+    # Наименьшая маска вида 2^k - 1, покрывающая rng (так выбирает randint в RandomState)
+    mask = rng
+    for shift in (1, 2, 4, 8, 16):
+        mask |= mask >> shift
+    return mask
+
+
+def position_chunks(seed: int, width: int, height: int, count: int, chunk: int = RAW_CHUNK):
+    # Порции (xs, ys) - то же, что count раз gen.randint(0, width), gen.randint(0, height).
+    # Сырые 32-битные значения генерируются пачками, а отбор по маске (как внутри randint)
+    # повторяется над ними без обращений к генератору на каждый бит.
+    gen = np.random.RandomState(seed)
+    raw = chain.from_iterable(
+        iter(lambda: gen.randint(0, 1 << 32, size=RAW_CHUNK, dtype=np.uint32).tolist(), None)
+    )
+    mask_x = _range_mask(width - 1)
+    mask_y = _range_mask(height - 1)
+    for start in range(0, count, chunk):
+        size = min(chunk, count - start)
+        xs = np.empty(size, dtype=np.int64)
+        ys = np.empty(size, dtype=np.int64)
+        for i in range(size):
+            # randint(0, 1) не расходует значений генератора
+            x = 0
+            if width > 1:
+                x = next(raw) & mask_x
+                while x >= width:
+                    x = next(raw) & mask_x
+            y = 0
+            if height > 1:
+                y = next(raw) & mask_y
+                while y >= height:
+                    y = next(raw) & mask_y
+            xs[i] = x
+            ys[i] = y
+        yield xs, ys
+
+
+def _join_chunks(chunks) -> tuple:
+    xs, ys = [np.zeros(0, dtype=np.int64)], [np.zeros(0, dtype=np.int64)]
+    for chunk_xs, chunk_ys in chunks:
+        xs.append(chunk_xs)
+        ys.append(chunk_ys)
+    return np.concatenate(xs), np.concatenate(ys)
+
+
+def positions(seed: int, width: int, height: int, count: int) -> tuple:
+    return _join_chunks(position_chunks(seed, width, height, count))
+
+
+# Позиции без повторов: ключевая перестановка Фейстеля над номерами пикселей 0 .. width*height - 1.
+# i-й бит получает пиксель P(i); значения вне диапазона (домен - степень двойки) проходят
+# перестановку повторно (cycle walking), поэтому P остается биекцией на номерах пикселей.
+# Позиции считаются порциями по мере надобности - время и память зависят только от длины сообщения.
+
+def _feistel_keys(seed: int) -> np.ndarray:
+    return np.random.SeedSequence(seed).generate_state(FEISTEL_ROUNDS, dtype=np.uint64)
+
+
+def _feistel_round(right: np.ndarray, key: np.uint64, mask: np.uint64) -> np.ndarray:
+    # Перемешивание splitmix64 от (right ^ key), обрезанное до половины разрядов
+    x = (right ^ key) * np.uint64(0x9E3779B97F4A7C15)
+    x ^= x >> np.uint64(29)
+    x *= np.uint64(0xBF58476D1CE4E5B9)
+    x ^= x >> np.uint64(32)
+    return x & mask
+
+
+def feistel_permute(values: np.ndarray, half_bits: int, keys: np.ndarray) -> np.ndarray:
+    # Перестановка чисел из [0, 2^(2 * half_bits))
+    shift = np.uint64(half_bits)
+    mask = np.uint64((1 << half_bits) - 1)
+    left = values >> shift
+    right = values & mask
+    for key in keys:
+        left, right = right, left ^ _feistel_round(right, key, mask)
+    return (left << shift) | right
+
+
+def unique_position_chunks(seed: int, width: int, height: int, count: int, chunk: int = RAW_CHUNK):
+    # Порции (xs, ys) различных позиций для бит 0 .. count - 1
+    total = width * height
+    if count > total:
+        raise ValueError("Сообщение длиннее числа пикселей изображения")
+    half_bits = max(1, ((total - 1).bit_length() + 1) // 2)
+    keys = _feistel_keys(seed)
+    for start in range(0, count, chunk):
+        index = np.arange(start, min(start + chunk, count), dtype=np.uint64)
+        index = feistel_permute(index, half_bits, keys)
+        outside = np.flatnonzero(index >= total)
+        while len(outside):
+            index[outside] = feistel_permute(index[outside], half_bits, keys)
+            outside = outside[index[outside] >= total]
+        index = index.astype(np.int64)
+        yield index % width, index // width
+
+
+def unique_positions(seed: int, width: int, height: int, count: int) -> tuple:
+    return _join_chunks(unique_position_chunks(seed, width, height, count))
+
+
+def make_positions(seed: int, width: int, height: int, count: int, unique: bool = False) -> tuple:
+    # unique=False - совместимые с прежними водяными знаками координаты RandomState (с повторами)
+    return (unique_positions if unique else positions)(seed, width, height, count)
+
+
+def make_position_chunks(seed: int, width: int, height: int, count: int, unique: bool = False, chunk: int = RAW_CHUNK):
+    return (unique_position_chunks if unique else position_chunks)(seed, width, height, count, chunk)
+
+
+def occurrence_rounds(flat_positions: np.ndarray) -> list:
+    # Номера бит, разбитые на раунды без повторов позиций: в раунде k - k-е попадание
+    # в каждую позицию. Раунды применяются по порядку, как последовательные записи.
+    order = np.argsort(flat_positions, kind="stable")
+    ordered = flat_positions[order]
+    starts = np.flatnonzero(np.concatenate(([True], ordered[1:] != ordered[:-1])))
+    group_start = np.repeat(starts, np.diff(np.append(starts, len(ordered))))
+    rank = np.arange(len(ordered)) - group_start
+    return [np.sort(order[rank == k]) for k in range(int(rank.max()) + 1)] if len(rank) else []
+
+
+def _to_float(channel: np.ndarray) -> np.ndarray:
+    # 8 бит -> redF()/greenF()/blueF() QColor (компонента хранится как value * 0x101)
+    return channel.astype(np.float64) * 257 / 65535
+
+
+def _to_8bit(value: np.ndarray) -> np.ndarray:
+    # setBlueF: qRound(value * 65535), затем 16 -> 8 бит с округлением (qt_div_257).
+    # Половина округляется вверх по точной дробной части: floor(x + 0.5) в double
+    # для x чуть меньше n + 0.5 может сам округлиться до n + 1.
+    scaled = value * 65535
+    whole = np.floor(scaled)
+    v16 = (whole + (scaled - whole >= 0.5)).astype(np.int64) + 0x80
+    # qt_div_257(x) = round(x / 257)
+    return ((v16 - (v16 >> 8)) >> 8).astype(np.uint8)
+
+
+def shift_blue(red: np.ndarray, green: np.ndarray, blue: np.ndarray, sign: np.ndarray, coeff: float) -> np.ndarray:
+    # Новый синий канал: blue +- яркость * coeff (sign = +1/-1), как через QColor в прежней реализации
+    red, green, blue = _to_float(red), _to_float(green), _to_float(blue)
+    brightness = 0.299 * red + 0.587 * green + 0.114 * blue
+    return _to_8bit(np.clip(blue + sign * brightness * coeff, 0.0, 1.0))
+
+
+def inject(rgb: np.ndarray, message_bits, coeff: float, seed: int, coords=None, unique: bool = False) -> np.ndarray:
+    # Встраивание на месте: rgb - массив (высота, ширина, 3) uint8 или представление буфера изображения.
+    # coords - заранее посчитанные make_positions() для этого seed и размера (при повторных встраиваниях).
+    bits = np.asarray(message_bits, dtype=np.int64)
+    height, width = rgb.shape[:2]
+    xs, ys = make_positions(seed, width, height, len(bits), unique) if coords is None else coords
+    sign = 2 * bits - 1
+    for idx in occurrence_rounds(ys * width + xs):
+        x, y = xs[idx], ys[idx]
+        rgb[y, x, 2] = shift_blue(rgb[y, x, 0], rgb[y, x, 1], rgb[y, x, 2], sign[idx], coeff)
+    return rgb
+
+
+def prefix_sums(blue: np.ndarray) -> tuple:
+    # Префиксные суммы синего канала: по строкам (h, w + 1) и по столбцам (h + 1, w), с нулем в начале.
+    # Сумма отрезка строки или столбца - разность двух элементов, т.е. O(1) при любом cdb_range.
+    height, width = blue.shape
+    rows = np.zeros((height, width + 1), dtype=np.int32)
+    np.cumsum(blue, axis=1, dtype=np.int32, out=rows[:, 1:])
+    cols = np.zeros((height + 1, width), dtype=np.int32)
+    np.cumsum(blue, axis=0, dtype=np.int32, out=cols[1:])
+    return rows, cols
+
+
+def decide(blue: np.ndarray, sums: tuple, xs: np.ndarray, ys: np.ndarray, cdb_range: int) -> np.ndarray:
+    # Биты по крестообразной окрестности: blue > (x_sum + y_sum - 2 * blue) / (4 * cdb_range).
+    # Сравнение ведется в целых 8-битных значениях - без погрешностей суммирования float.
+    height, width = blue.shape
+    rows, cols = sums
+    x_end = np.minimum(xs + cdb_range, width - 1) + 1
+    y_end = np.minimum(ys + cdb_range, height - 1) + 1
+    x_sum = rows[ys, x_end].astype(np.int64) - rows[ys, xs]
+    y_sum = cols[y_end, xs].astype(np.int64) - cols[ys, xs]
+    center = blue[ys, xs].astype(np.int64)
+    return (4 * cdb_range * center > x_sum + y_sum - 2 * center).astype(np.uint8)
+
+
+def decide_direct(blue: np.ndarray, xs: np.ndarray, ys: np.ndarray, cdb_range: int) -> np.ndarray:
+    # То же, что decide, но суммы окрестностей собираются прямо из пикселей (O(бит * cdb_range)).
+    # Выгодно, когда проверяется малая часть бит и префиксные суммы всего изображения не окупаются.
+    height, width = blue.shape
+    offsets = np.arange(cdb_range + 1)
+    cols = xs[:, None] + offsets
+    rows = ys[:, None] + offsets
+    x_sum = np.where(cols < width, blue[ys[:, None], np.minimum(cols, width - 1)], 0).sum(axis=1, dtype=np.int64)
+    y_sum = np.where(rows < height, blue[np.minimum(rows, height - 1), xs[:, None]], 0).sum(axis=1, dtype=np.int64)
+    center = blue[ys, xs].astype(np.int64)
+    return (4 * cdb_range * center > x_sum + y_sum - 2 * center).astype(np.uint8)
+
+
+def extract(rgb: np.ndarray, count: int, cdb_range: int, seed: int, unique: bool = False) -> np.ndarray:
+    # -> count бит водяного знака
+    if cdb_range < 1:
+        raise ValueError("Диапазон CDB должен быть положительным")
+    blue = rgb[..., 2]
+    height, width = blue.shape
+    xs, ys = make_positions(seed, width, height, count, unique)
+    return decide(blue, prefix_sums(blue), xs, ys, cdb_range)
@@ -0,0 +1,44 @@
+import sys
+
+import numpy as np
+from PyQt5.QtGui import QImage
+
+from cdb import shift_blue
+
+# Сверка округления синего канала CDB с Qt: для всех 8-битных значений синего и всех
+# уровней серого в красном и зеленом новый синий считается так же, как прежняя реализация
+# (QColor.setBlueF + QImage.setPixelColor), и сравнивается с cdb.shift_blue.
+# Запуск: python3 check_qt_rounding.py  (код возврата 1 при расхождениях)
+
+COEFFS = (0.01, 0.05, 0.1, 0.3, 1.0)
+
+
+def qt_shift_blue(gray: int, blue: int, bit: int, coeff: float) -> int:
+    image = QImage(1, 1, QImage.Format_RGB32)
+    image.setPixel(0, 0, (0xFF << 24) | (gray << 16) | (gray << 8) | blue)
+    color = image.pixelColor(0, 0)
+    brightness = 0.299 * color.redF() + 0.587 * color.greenF() + 0.114 * color.blueF()
+    new_blue = color.blueF() + (2 * bit - 1) * brightness * coeff
+    color.setBlueF(max(0.0, min(1.0, new_blue)))
+    image.setPixelColor(0, 0, color)
+    return image.pixel(0, 0) & 0xFF
+
+
+def main():
+    gray, blue = np.meshgrid(np.arange(256, dtype=np.uint8), np.arange(256, dtype=np.uint8), indexing="ij")
+    mismatches = 0
+    for coeff in COEFFS:
+        for bit in (0, 1):
+            ours = shift_blue(gray, gray, blue, 2 * bit - 1, coeff)
+            for g in range(256):
+                for b in range(256):
+                    expected = qt_shift_blue(g, b, bit, coeff)
+                    if ours[g, b] != expected:
+                        mismatches += 1
+                        print(f"coeff={coeff} bit={bit} gray={g} blue={b}: {ours[g, b]} != {expected}")
+    print(f"Расхождений: {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,9 @@
+import os
 import sys
-import numpy as np
 from PyQt5.QtGui import QImage
 from PyQt5.QtWidgets import (
     QApplication,
+    QCheckBox,
     QFileDialog,
     QMainWindow,
     QPushButton,
@@ -13,6 +14,11 @@ from PyQt5.QtWidgets import (
     QTextEdit,
 )
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cdb import DEFAULT_SEED, extract, inject
+from stegotools.codec import bits_to_text, text_to_bits
+from stegotools.qtimage import rgb_view
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -22,7 +28,7 @@ class MainWindow(QMainWindow):
         # Параметры по умолчанию
         self.cdb_coeff = 0.9
         self.cdb_range = 3
-        self.seed = 0xAAAA
+        self.seed = DEFAULT_SEED
         self.input_image_format = None
         self.image = None
         self.bit_size = 0
@@ -52,6 +58,10 @@ class MainWindow(QMainWindow):
 
         form_layout.addRow("коэффициент CDB:", self.cdb_coeff_input)
         form_layout.addRow("диапазон CDB:", self.cdb_range_input)
+
+        # Позиции без повторов (перестановка Фейстеля); выключено - совместимость с прежними контейнерами
+        self.unique_positions_check = QCheckBox()
+        form_layout.addRow("позиции без повторов:", self.unique_positions_check)
         control_layout.addLayout(form_layout)
 
         self.select_image_button = QPushButton("Выбрать изображение")
@@ -103,6 +113,8 @@ class MainWindow(QMainWindow):
         try:
             self.cdb_coeff = float(self.cdb_coeff_input.text())
             self.cdb_range = int(self.cdb_range_input.text())
+            if self.cdb_range < 1:
+                raise ValueError
         except ValueError:
             self.output_text.append("Ошибка: неверные значения параметров.")
             return
@@ -121,7 +133,11 @@ class MainWindow(QMainWindow):
         self.output_text.append(f"Сообщение для встраивания: {message}")
 
         # Встраивание сообщения
-        self.modified_image = self.cdb_inject(message_bits, self.image)
+        try:
+            self.modified_image = self.cdb_inject(message_bits, self.image)
+        except ValueError as e:
+            self.output_text.append(f"Ошибка: {e}")
+            return
         self.output_text.append("Сообщение успешно встроено в изображение.\n")
 
     def extract_message(self):
@@ -161,6 +177,8 @@ class MainWindow(QMainWindow):
         try:
             self.cdb_coeff = float(self.cdb_coeff_input.text())
             self.cdb_range = int(self.cdb_range_input.text())
+            if self.cdb_range < 1:
+                raise ValueError
         except ValueError:
             self.output_text.append("Ошибка: неверные значения параметров.")
             return
@@ -179,7 +197,11 @@ class MainWindow(QMainWindow):
 
         # Встраивание и извлечение сообщения
         img = self.image
-        modified_image = self.cdb_inject(message_bits, img)
+        try:
+            modified_image = self.cdb_inject(message_bits, img)
+        except ValueError as e:
+            self.output_text.append(f"Ошибка: {e}")
+            return
         extracted_bits = self.cdb_extract(modified_image)
 
         # Преобразование битов в текст
@@ -198,74 +220,30 @@ class MainWindow(QMainWindow):
 
     def cdb_inject(self, message_bits: list, img: QImage) -> QImage:
         #Встраивание сообщения в изображение по методу CDB.
-        gen = np.random.RandomState(self.seed)
-        new_img = QImage(img)  # Создаем копию изображения для изменений
-        width = new_img.width()
-        height = new_img.height()
-
-        for bit in message_bits:
-            x = gen.randint(0, width)
-            y = gen.randint(0, height)
-
-            pixel_color = new_img.pixelColor(x, y)
-            red = pixel_color.redF()
-            green = pixel_color.greenF()
-            blue = pixel_color.blueF()
-            brightness = 0.299 * red + 0.587 * green + 0.114 * blue
-            new_blue = blue + (2 * bit - 1) * brightness * self.cdb_coeff
-            new_blue = max(0.0, min(1.0, new_blue))
-            pixel_color.setBlueF(new_blue)
-            new_img.setPixelColor(x, y, pixel_color)
+        # Копия в 32-битном формате, пиксели меняются напрямую через представление ее буфера
+        fmt = QImage.Format_ARGB32 if img.hasAlphaChannel() else QImage.Format_RGB32
+        new_img = img.convertToFormat(fmt)
+        inject(rgb_view(new_img), message_bits, self.cdb_coeff, self.seed,
+               unique=self.unique_positions_check.isChecked())
         return new_img
 
     def cdb_extract(self, img: QImage) -> list:
         #Извлечение сообщения из изображения по методу CDB.
-        message_bits = []
-        gen = np.random.RandomState(self.seed)
-        width = img.width()
-        height = img.height()
-        for _ in range(self.bit_size):
-            x = gen.randint(0, width)
-            y = gen.randint(0, height)
-            x_sum = sum(
-                img.pixelColor(i, y).blueF()
-                for i in range(max(x, 0), min(x + self.cdb_range, width - 1) + 1)
-            )
-            y_sum = sum(
-                img.pixelColor(x, i).blueF()
-                for i in range(max(y, 0), min(y + self.cdb_range, height - 1) + 1)
-            )
-            predicted_blue = (x_sum + y_sum - 2 * img.pixelColor(x, y).blueF()) / (
-                4 * self.cdb_range
-            )
-            message_bits.append(int(img.pixelColor(x, y).blueF() > predicted_blue))
-        return message_bits
+        fmt = QImage.Format_ARGB32 if img.hasAlphaChannel() else QImage.Format_RGB32
+        img = img.convertToFormat(fmt)  # ссылка держит буфер, пока с ним работает представление
+        unique = self.unique_positions_check.isChecked()
+        return extract(rgb_view(img), self.bit_size, self.cdb_range, self.seed, unique).tolist()
 
     def text_to_bits(self, text: str) -> list:
         #Преобразование текста в список битов.
-        bits = []
-        for char in text:
-            binary = bin(ord(char))[2:].zfill(8)
-            bits.extend([int(b) for b in binary])
-        return bits
+        return text_to_bits(text).tolist()
 
     def bits_to_text(self, bits: list) -> str:
         #Преобразование списка битов в текст.
-        text = ""
         if len(bits) % 8 != 0:
             self.output_text.append("Предупреждение: неполное количество битов для преобразования в текст.")
-            return text
-
-        for i in range(0, len(bits), 8):
-            byte = bits[i:i + 8]
-            char_code = int("".join(str(b) for b in byte), 2)
-            try:
-                text += chr(char_code)
-            except ValueError:
-                self.output_text.append(f"Ошибка: Недопустимый код символа: {char_code}")
-                return text
-
-        return text
+            return ""
+        return bits_to_text(bits)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
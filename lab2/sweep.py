@@ -0,0 +1,110 @@
+import argparse
+import csv
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cdb import DEFAULT_SEED, decide, inject, make_positions, prefix_sums
+from stegotools.codec import text_to_bits
+
+# Перебор параметров CDB (коэффициент x диапазон) без интерфейса, с таблицей BER в CSV.
+# Задача пула - одна пара (изображение, коэффициент): встраивание делается один раз,
+# а все диапазоны проверяются по одним и тем же префиксным суммам.
+# Декодированное изображение и координаты кэшируются в каждом процессе, задачи идут
+# по изображениям подряд, поэтому каждый процесс декодирует изображение не более одного раза.
+
+FIELDS = ["image", "coeff", "range", "bits", "errors", "ber"]
+
+
+@lru_cache(maxsize=2)
+def load_rgb(path: str) -> np.ndarray:
+    return np.array(Image.open(path).convert("RGB"))
+
+
+@lru_cache(maxsize=4)
+def cached_positions(seed: int, width: int, height: int, count: int, unique: bool) -> tuple:
+    return make_positions(seed, width, height, count, unique)
+
+
+def sweep_cell(path: str, coeff: float, ranges, bits: np.ndarray, seed: int = DEFAULT_SEED, unique: bool = False) -> list:
+    # -> строки таблицы для одного изображения и коэффициента по всем диапазонам
+    rgb = load_rgb(path)
+    height, width = rgb.shape[:2]
+    coords = cached_positions(seed, width, height, len(bits), unique)
+    stego = inject(rgb.copy(), bits, coeff, seed, coords)
+    blue = stego[..., 2]
+    sums = prefix_sums(blue)
+    rows = []
+    for cdb_range in ranges:
+        errors = int(np.count_nonzero(decide(blue, sums, *coords, cdb_range) != bits))
+        rows.append({
+            "image": path,
+            "coeff": coeff,
+            "range": cdb_range,
+            "bits": len(bits),
+            "errors": errors,
+            "ber": errors / len(bits) if len(bits) else 0.0,
+        })
+    return rows
+
+
+def sweep(paths, coeffs, ranges, bits, seed: int = DEFAULT_SEED, workers=None, unique: bool = False):
+    # Строки таблицы по мере готовности (в порядке изображение -> коэффициент -> диапазон)
+    if any(r < 1 for r in ranges):
+        raise ValueError("Диапазон CDB должен быть положительным")
+    bits = np.asarray(bits, dtype=np.uint8)
+    cells = [(path, coeff) for path in paths for coeff in coeffs]
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+        results = executor.map(
+            sweep_cell,
+            [path for path, _ in cells],
+            [coeff for _, coeff in cells],
+            [list(ranges)] * len(cells),
+            [bits] * len(cells),
+            [seed] * len(cells),
+            [unique] * len(cells),
+        )
+        for rows in results:
+            yield from rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Перебор параметров CDB с оценкой доли ошибочных бит")
+    parser.add_argument("images", nargs="+", help="изображения-контейнеры")
+    parser.add_argument("--coeffs", nargs="+", type=float, required=True, help="значения коэффициента CDB")
+    parser.add_argument("--ranges", nargs="+", type=int, required=True, help="значения диапазона CDB")
+    message = parser.add_mutually_exclusive_group(required=True)
+    message.add_argument("-m", "--message", help="текст водяного знака")
+    message.add_argument("--message-file", help="файл с текстом водяного знака")
+    parser.add_argument("--seed", type=lambda v: int(v, 0), default=DEFAULT_SEED, help="ключ генератора координат")
+    parser.add_argument("--unique", action="store_true", help="позиции без повторов (перестановка Фейстеля)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="число процессов")
+    parser.add_argument("-o", "--output", help="CSV-файл (по умолчанию stdout)")
+    args = parser.parse_args(argv)
+
+    if args.message_file:
+        with open(args.message_file, "r", encoding="utf-8") as f:
+            text = f.read()
+    else:
+        text = args.message
+    bits = text_to_bits(text)
+
+    out = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    try:
+        writer = csv.DictWriter(out, fieldnames=FIELDS)
+        writer.writeheader()
+        for row in sweep(args.images, args.coeffs, args.ranges, bits, args.seed, args.workers, args.unique):
+            writer.writerow(row)
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
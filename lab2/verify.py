@@ -0,0 +1,123 @@
+import argparse
+import csv
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from PIL import Image
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cdb import DEFAULT_SEED, decide_direct, make_position_chunks
+from stegotools.codec import text_to_bits
+
+# Массовая проверка изображений на известный водяной знак CDB.
+# Биты извлекаются порциями; после каждой порции доля ошибок (BER) сравнивается с порогом
+# с запасом по неравенству Хёфдинга, и проверка файла прекращается, как только вывод
+# статистически надежен. Суммы окрестностей собираются только для проверенных бит.
+
+EXTENSIONS = (".pgm", ".png", ".bmp", ".jpg", ".jpeg", ".tif", ".tiff")
+FIELDS = ["image", "verdict", "bits", "errors", "ber"]
+CHECK_CHUNK = 256
+
+
+def hoeffding_margin(checked: int, delta: float) -> float:
+    # Отклонение наблюдаемой доли от истинной, превышаемое с вероятностью не больше delta
+    return math.sqrt(math.log(2 / delta) / (2 * checked))
+
+
+def verify_file(path: str, bits: np.ndarray, cdb_range: int, seed: int = DEFAULT_SEED,
+                unique: bool = False, threshold: float = 0.2, delta: float = 1e-6) -> dict:
+    # -> строка отчета: "present"/"absent" - BER с запасом Хёфдинга ниже/выше порога,
+    # "undecided" - все биты проверены, а запас так и не позволил сделать вывод (короткий знак)
+    blue = np.array(Image.open(path).convert("RGB"))[..., 2]
+    height, width = blue.shape
+    checked = 0
+    errors = 0
+    verdict = "undecided"
+    for xs, ys in make_position_chunks(seed, width, height, len(bits), unique, CHECK_CHUNK):
+        got = decide_direct(blue, xs, ys, cdb_range)
+        errors += int(np.count_nonzero(got != bits[checked:checked + len(got)]))
+        checked += len(got)
+        ber = errors / checked
+        margin = hoeffding_margin(checked, delta)
+        if ber + margin < threshold:
+            verdict = "present"
+            break
+        if ber - margin > threshold:
+            verdict = "absent"
+            break
+    return {
+        "image": path,
+        "verdict": verdict,
+        "bits": checked,
+        "errors": errors,
+        "ber": errors / checked if checked else 0.0,
+    }
+
+
+def find_images(folder: str) -> list:
+    found = []
+    for root, _, files in os.walk(folder):
+        for name in sorted(files):
+            if name.lower().endswith(EXTENSIONS):
+                found.append(os.path.join(root, name))
+    return found
+
+
+def verify_folder(folder: str, bits, cdb_range: int, seed: int = DEFAULT_SEED, unique: bool = False,
+                  threshold: float = 0.2, delta: float = 1e-6, workers=None):
+    # Строки отчета по мере завершения файлов; ошибка чтения одного файла не останавливает проверку
+    if cdb_range < 1:
+        raise ValueError("Диапазон CDB должен быть положительным")
+    bits = np.asarray(bits, dtype=np.uint8)
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+        futures = {
+            executor.submit(verify_file, path, bits, cdb_range, seed, unique, threshold, delta): path
+            for path in find_images(folder)
+        }
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                yield {"image": futures[future], "verdict": f"error: {e}", "bits": 0, "errors": 0, "ber": ""}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Проверка папки изображений на водяной знак CDB")
+    parser.add_argument("folder", help="папка с изображениями (с подпапками)")
+    message = parser.add_mutually_exclusive_group(required=True)
+    message.add_argument("-m", "--message", help="текст водяного знака")
+    message.add_argument("--message-file", help="файл с текстом водяного знака")
+    parser.add_argument("--range", dest="cdb_range", type=int, default=3, help="диапазон CDB")
+    parser.add_argument("--seed", type=lambda v: int(v, 0), default=DEFAULT_SEED, help="ключ генератора координат")
+    parser.add_argument("--unique", action="store_true", help="позиции без повторов (перестановка Фейстеля)")
+    parser.add_argument("--threshold", type=float, default=0.2, help="порог доли ошибочных бит")
+    parser.add_argument("--delta", type=float, default=1e-6, help="допустимая вероятность ошибки досрочного вывода")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="число процессов")
+    parser.add_argument("-o", "--output", help="CSV-файл отчета (по умолчанию stdout)")
+    args = parser.parse_args(argv)
+
+    if args.message_file:
+        with open(args.message_file, "r", encoding="utf-8") as f:
+            text = f.read()
+    else:
+        text = args.message
+    bits = text_to_bits(text)
+
+    out = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    try:
+        writer = csv.DictWriter(out, fieldnames=FIELDS)
+        writer.writeheader()
+        for row in verify_folder(args.folder, bits, args.cdb_range, args.seed, args.unique,
+                                 args.threshold, args.delta, args.workers):
+            writer.writerow(row)
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import os
+import sys
+from itertools import chain
+
+import numpy as np
+from PIL import Image
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from stegotools.capacity_cache import cached_capacity
+from stegotools.codec import decode_text, fill_prefix, from_pairs, text_to_bits, to_pairs
+
+# Встраивание сопоставлением MSB и замены LSB.
+# Каждый пиксель дает три позиции (слота) - пары битов 7-6, 6-5 и 5-4.
+# Слоты просматриваются по порядку, очередная пара сообщения "встраивается" в первый
+# слот с таким же значением, флаг совпадения записывается в соответствующий LSB.
+
+WINDOW_PIXELS = 1 << 20
+PAIRS_CHUNK = 1 << 16
+# версия алгоритма в ключе кэша емкости: менять при изменении правил сопоставления
+ALGORITHM_VERSION = 2
+
+
+def message_pairs(secret_msg: str) -> np.ndarray:
+    # Пары битов сообщения (UTF-8) с завершающим нулевым байтом
+    return to_pairs(text_to_bits(secret_msg, terminator=True))
+
+
+def slot_values(pixels: np.ndarray) -> np.ndarray:
+    # Значения слотов для последовательности пикселей: [7-6, 6-5, 5-4] на пиксель
+    pixels = pixels.reshape(-1, 1)
+    return ((pixels >> np.array([6, 5, 4], dtype=pixels.dtype)) & 0b11).reshape(-1).astype(np.uint8)
+
+
+def match_slots(flat_pixels: np.ndarray, pairs: np.ndarray, window: int = WINDOW_PIXELS) -> np.ndarray:
+    # Номера слотов, в которые жадно сопоставляются пары сообщения.
+    # Значения слотов окна пикселей собираются в bytes, и поиск следующего слота с нужным
+    # значением выполняет bytes.find (memchr) - в Python остается один вызов на пару.
+    needles = [bytes([p]) for p in range(4)]
+    # пары переводятся в Python-объекты порциями, по мере продвижения по изображению
+    remaining = chain.from_iterable(
+        map(needles.__getitem__, pairs[i:i + PAIRS_CHUNK].tolist()) for i in range(0, len(pairs), PAIRS_CHUNK)
+    )
+    pending = next(remaining, None)
+    matched = []
+    append = matched.append
+    for start in range(0, len(flat_pixels), window):
+        if pending is None:
+            break
+        find = slot_values(flat_pixels[start:start + window]).tobytes().find
+        base = start * 3
+        pos = find(pending)
+        if pos < 0:
+            continue
+        append(base + pos)
+        pending = None
+        for needle in remaining:
+            pos = find(needle, pos + 1)
+            if pos < 0:
+                pending = needle
+                break
+            append(base + pos)
+    return np.array(matched, dtype=np.int64)
+
+
+def capacity(pixels: np.ndarray, payload: str) -> int:
+    # Сколько бит payload (вместе с терминатором) поместится в изображение.
+    # Считается только сопоставление слотов, стегоизображение не строится.
+    return 2 * len(match_slots(pixels.reshape(-1), message_pairs(payload)))
+
+
+def embed(pixels: np.ndarray, secret_msg: str) -> tuple:
+    # -> (число встроенных бит, стегоизображение)
+    pairs = message_pairs(secret_msg)
+    stego = pixels.copy()
+    flat = stego.reshape(-1)
+    slots = match_slots(flat, pairs)
+
+    if len(slots) == len(pairs):
+        # сообщение и терминатор записаны - дальше пиксели не трогаем
+        touched = slots[-1] // 3 + 1
+    else:
+        touched = len(flat)
+
+    flags = np.zeros(touched * 3, dtype=flat.dtype)
+    flags[slots] = 1
+    flags = flags.reshape(-1, 3)
+    lsb3 = (flags[:, 0] << 2) | (flags[:, 1] << 1) | flags[:, 2]
+    flat[:touched] = (flat[:touched] & 0xF0) | lsb3
+    return 2 * len(slots), stego
+
+
+def embed_file(carrier_path: str, book: str, percentage: str) -> tuple:
+    # Встраивание начала книги в один носитель с заданным процентом заполнения.
+    # -> (путь к стегоизображению, число встроенных бит)
+    carrier = np.array(Image.open(carrier_path))
+    capacity_bits = cached_capacity(carrier, "lab3-msb-lsb", ALGORITHM_VERSION, book, lambda: capacity(carrier, book))
+    target_bits, secret = fill_prefix(book, capacity_bits, percentage)
+    secret_msg = decode_text(secret)
+    _, pixels = embed(carrier, secret_msg)
+
+    filename, file_extension = os.path.splitext(carrier_path)
+    output_path = f"{filename}_stego_lab3_{percentage}{file_extension}"
+    Image.fromarray(pixels.astype(np.uint8)).save(output_path)
+    return output_path, target_bits
+
+
+def iter_message(pixels: np.ndarray, window: int = 1 << 14):
+    # Потоковое извлечение: байты сообщения порциями до первого нулевого байта.
+    # Окно растет вдвое (до WINDOW_PIXELS), чтобы короткие сообщения не требовали разбора всего изображения.
+    flat = pixels.reshape(-1)
+    carry = np.zeros(0, dtype=np.uint8)
+    start = 0
+    while start < len(flat):
+        chunk = flat[start:start + window]
+        start += len(chunk)
+        window = min(window * 2, WINDOW_PIXELS)
+
+        flags = ((chunk.reshape(-1, 1) >> np.array([2, 1, 0], dtype=chunk.dtype)) & 1).reshape(-1)
+        pairs = np.concatenate((carry, slot_values(chunk)[flags == 1]))
+        whole = len(pairs) // 4 * 4
+        carry = pairs[whole:]
+
+        data = np.packbits(from_pairs(pairs[:whole]))
+
+        end = np.flatnonzero(data == 0)
+        if len(end):
+            if end[0]:
+                yield data[:end[0]].tobytes()
+            return
+        if len(data):
+            yield data.tobytes()
+
+
+def extract(pixels: np.ndarray) -> str:
+    # Сообщение до терминатора (UTF-8)
+    return decode_text(b"".join(iter_message(pixels)))
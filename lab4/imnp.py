@@ -0,0 +1,190 @@
+import math
+import os
+import sys
+from collections import namedtuple
+
+import numpy as np
+from PIL import Image
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from stegotools.codec import (
+    bits_to_text, bytes_to_bits, decode_text, encode_text, fill_prefix, read_fields, text_to_bits, write_fields,
+)
+
+# строк блоков в одной порции потокового извлечения
+BLOCK_ROWS = 64
+
+def message_bits(msg):
+    # Биты сообщения (UTF-8) массивом 0/1
+    return text_to_bits(msg)
+
+def psnr(img1, img2):
+    arr1 = np.array(img1, dtype=float)
+    arr2 = np.array(img2, dtype=float)
+    mse = np.mean((arr1 - arr2) ** 2)
+    if mse == 0:
+        return float('inf')
+    return 20 * math.log10(255.0 / math.sqrt(mse))
+
+# Смещения интерполируемых пикселей блока 2x2 в порядке обхода: (0, 1), (1, 0), (1, 1)
+OFFSETS = [(0, 1), (1, 0), (1, 1)]
+
+def floor_log2(v):
+    # floor(log2(v)) для v > 0 и 0 для остальных, без погрешностей float
+    exponent = np.frexp(np.maximum(v, 1))[1] - 1
+    return np.where(v > 0, exponent, 0)
+
+def bit_length(v):
+    return np.where(v > 0, floor_log2(v) + 1, 0)
+
+def interpolate(pix):
+    # Расчет для всех блоков сразу по опорной сетке pix[::2, ::2].
+    # -> C (значения интерполяции), ref (опорное значение для встраивания), ak (бит на пиксель);
+    # форма (блоки по x, блоки по y, 3) в порядке OFFSETS
+    M, N = pix.shape
+    R = len(range(0, M - 2, 2))
+    S = len(range(0, N - 2, 2))
+    grid = pix[::2, ::2]
+    p00 = grid[:R, :S]
+    p20 = grid[1:R + 1, :S]
+    p02 = grid[:R, 1:S + 1]
+    p22 = grid[1:R + 1, 1:S + 1]
+
+    Omin = np.minimum(np.minimum(p00, p20), np.minimum(p02, p22))
+    Omax = np.maximum(np.maximum(p00, p20), np.maximum(p02, p22))
+
+    C01 = (Omax + (p00 + p02) // 2) // 2
+    C10 = (Omax + (p00 + p20) // 2) // 2
+    C11 = (C10 + C01) // 2
+
+    C = np.stack([C01, C10, C11], axis=-1)
+    ref = np.stack([np.maximum(p00, p02), np.maximum(p00, p20), np.minimum(C10, C01)], axis=-1)
+    ak = floor_log2(C - Omin[..., np.newaxis])
+    return C, ref, ak
+
+def field_view(arr, dx, dy, R, S):
+    # Интерполируемые пиксели (x + dx, y + dy) всех блоков как срез массива
+    return arr[dx:2 * R + dx:2, dy:2 * S + dy:2]
+
+def set_fields(arr, values):
+    R, S = values.shape[:2]
+    for idx, (dx, dy) in enumerate(OFFSETS):
+        field_view(arr, dx, dy, R, S)[...] = values[..., idx]
+
+def get_fields(arr, R, S):
+    return np.stack([field_view(arr, dx, dy, R, S) for dx, dy in OFFSETS], axis=-1)
+
+# Карта емкости контейнера: C, ref и ak по всем полям (см. interpolate), capacity - сумма ak.
+# Зависит только от опорных пикселей, поэтому одинакова для контейнера и стегоизображения.
+CapacityMap = namedtuple("CapacityMap", "C ref ak capacity")
+
+def capacity_map(pix):
+    C, ref, ak = interpolate(pix)
+    return CapacityMap(C, ref, ak, int(ak.sum()))
+
+def fit_fields(ak, total_bits):
+    # Какие поля (в порядке обхода) получат биты сообщения длиной total_bits.
+    # Поле берется, если целиком помещается в остаток: сначала это префикс полей,
+    # затем остаток (меньше 8 бит) добирается полями подходящей ширины.
+    ak = ak.reshape(-1)
+    used = np.cumsum(ak)
+    first = int(np.searchsorted(used, total_bits, side="right"))
+    mask = np.zeros(len(ak), dtype=bool)
+    mask[:first] = ak[:first] > 0
+    remaining = total_bits - (int(used[first - 1]) if first else 0)
+    k = first
+    while remaining > 0 and k < len(ak):
+        tail = ak[k + 1:]
+        candidates = np.flatnonzero((tail > 0) & (tail <= remaining))
+        if not len(candidates):
+            break
+        k += 1 + int(candidates[0])
+        mask[k] = True
+        remaining -= int(ak[k])
+    return mask
+
+def fill_fields(pix, cmap, mask, bits):
+    # Запись выбранных полей: ref - Rk для полей с битами, C для остальных -> (стего, интерполированное)
+    values = cmap.C.reshape(-1).copy()
+    values[mask] = cmap.ref.reshape(-1)[mask] - read_fields(bits, cmap.ak.reshape(-1)[mask])
+
+    stego = pix.copy()
+    inter = pix.copy()
+    set_fields(stego, values.reshape(cmap.C.shape))
+    set_fields(inter, cmap.C)
+    return stego, inter
+
+def read_bits(stego, cmap, mask):
+    # Биты выбранных полей стегоизображения. Rk шире поля (чужой или испорченный контейнер)
+    # записывается всеми своими битами - как f'{Rk:0{ak}b}' в исходном алгоритме.
+    R, S = cmap.C.shape[:2]
+    Rk = np.maximum(cmap.ref.reshape(-1)[mask] - get_fields(stego, R, S).reshape(-1)[mask], 0)
+    return write_fields(Rk, np.maximum(cmap.ak.reshape(-1)[mask], bit_length(Rk)))
+
+def from_bits(bits):
+    # Неполный последний байт (емкости контейнера не хватило) отбрасывается
+    return bits_to_text(bits)
+
+def embed(pix, cmap, bits):
+    # Встраивание по готовой карте емкости -> (встроено бит, стего, интерполированное), без записи на диск
+    mask = fit_fields(cmap.ak, len(bits))
+    stego, inter = fill_fields(pix, cmap, mask, bits)
+    max_hide = int(cmap.ak.reshape(-1)[mask].sum())
+    return max_hide, np.clip(stego, 0, 255).astype(np.uint8), np.clip(inter, 0, 255).astype(np.uint8)
+
+def hide(img_path, message, out_path):
+    img = Image.open(img_path)
+    pix = np.array(img, dtype=int)
+    max_hide, stego, inter = embed(pix, capacity_map(pix), message_bits(message))
+    Image.fromarray(stego).save(out_path)
+    return max_hide, Image.fromarray(inter)
+
+def iter_message(stego, total_bits, block_rows=BLOCK_ROWS):
+    # Потоковое извлечение: байты сообщения по мере обработки полос из block_rows строк блоков.
+    # Поля полосы раскладываются в биты, целые байты упаковываются сразу в заранее выделенный
+    # буфер, остаток (меньше 8 бит) переносится в следующую полосу; неполный последний байт отбрасывается.
+    cmap = capacity_map(stego)
+    mask = fit_fields(cmap.ak, total_bits)
+    R, S = cmap.C.shape[:2]
+    buffer = np.empty(total_bits // 8, dtype=np.uint8)
+    written = 0
+    carry = np.zeros(0, dtype=np.uint8)
+    remaining = total_bits
+    for r0 in range(0, R, block_rows):
+        if not remaining:
+            break
+        rows = slice(r0, r0 + block_rows)
+        band = CapacityMap(cmap.C[rows], cmap.ref[rows], cmap.ak[rows], None)
+        band_mask = mask[r0 * S * 3:(r0 + block_rows) * S * 3]
+        # band_pixels: поля полосы лежат в строках 2*r0 .. 2*r1
+        bits = read_bits(stego[2 * r0:], band, band_mask)[:remaining]
+        remaining -= len(bits)
+        bits = np.concatenate((carry, bits))
+        whole = len(bits) // 8 * 8
+        carry = bits[whole:]
+        count = whole // 8
+        buffer[written:written + count] = np.packbits(bits[:whole])
+        if count:
+            yield buffer[written:written + count].tobytes()
+        written += count
+
+def extract(stego_path, msg_length):
+    stego = np.array(Image.open(stego_path), dtype=int)
+    return decode_text(b"".join(iter_message(stego, msg_length * 8)))
+
+def embed_file(path: str, book: str, percentage: str) -> tuple:
+    # Встраивание начала книги в один контейнер с заданным процентом заполнения.
+    # Карта емкости считается один раз, стегоизображение записывается один раз.
+    # -> (путь к стегоизображению, PSNR, число встроенных бит, длина сообщения в байтах UTF-8)
+    filename, ext = os.path.splitext(path)
+    stego_path = f"{filename}_stego_lab4_{percentage}{ext}"
+
+    pix = np.array(Image.open(path), dtype=int)
+    cmap = capacity_map(pix)
+    # емкость для всей книги; карта емкости нужна для встраивания в любом случае, поэтому не кэшируется
+    max_hide = int(cmap.ak.reshape(-1)[fit_fields(cmap.ak, len(encode_text(book)) * 8)].sum())
+    target_bits, secret = fill_prefix(book, max_hide, percentage)
+
+    _, stego, inter = embed(pix, cmap, bytes_to_bits(secret))
+    Image.fromarray(stego).save(stego_path)
+    return stego_path, psnr(inter, stego), target_bits, len(secret)
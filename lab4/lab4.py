@@ -1,109 +1,15 @@
 import sys
-import math
-import numpy as np
-from PIL import Image
 import os
 
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QPushButton,
-    QLineEdit, QFileDialog, QTextEdit
+    QLineEdit, QFileDialog, QTextEdit, QSpinBox, QProgressBar
 )
 
-def to_bin(msg):
-    return ''.join(f'{ord(c):08b}' for c in msg)
-
-def from_bin(bits):
-    return ''.join(chr(int(bits[i:i+8], 2)) for i in range(0, len(bits), 8))
-
-def psnr(img1, img2):
-    arr1 = np.array(img1, dtype=float)
-    arr2 = np.array(img2, dtype=float)
-    mse = np.mean((arr1 - arr2) ** 2)
-    if mse == 0:
-        return float('inf')
-    return 20 * math.log10(255.0 / math.sqrt(mse))
-
-def hide(img_path, message, out_path):
-    img = Image.open(img_path)
-    pix = np.array(img, dtype=int)
-    bits = to_bin(message)
-    bit_idx = 0
-    M, N = pix.shape
-    stego = pix.copy()
-    inter = pix.copy()
-
-    max_hide = 0
-
-    for x in range(0, M - 2, 2):
-        for y in range(0, N - 2, 2):
-            Omin = np.min([pix[x, y], pix[x+2, y], pix[x, y+2], pix[x+2, y+2]])
-            Omax = np.max([pix[x, y], pix[x+2, y], pix[x, y+2], pix[x+2, y+2]])
-
-            C = np.zeros((2, 2), dtype=int)
-            C[0, 0] = pix[x, y]
-            C[0, 1] = (Omax + ((pix[x, y] + pix[x, y+2]) // 2)) // 2
-            C[1, 0] = (Omax + ((pix[x, y] + pix[x+2, y]) // 2)) // 2
-            C[1, 1] = (C[1, 0] + C[0, 1]) // 2
-
-            vk = [C[0, 1] - Omin, C[1, 0] - Omin, C[1, 1] - Omin]
-
-            for idx, (dx, dy) in enumerate([(0, 1), (1, 0), (1, 1)]):
-                ak = math.floor(math.log2(vk[idx])) if vk[idx] > 0 else 0
-                if ak > 0 and bit_idx + ak <= len(bits):
-                    Rk = int(bits[bit_idx:bit_idx + ak], 2)
-                    bit_idx += ak
-                    max_hide += ak
-                    if (dx, dy) == (1, 1):
-                        ref = min(C[1, 0], C[0, 1])
-                    else:
-                        ref = max(pix[x, y], pix[x + 2*dx, y + 2*dy])
-                    stego[x + dx, y + dy] = ref - Rk
-                else:
-                    stego[x + dx, y + dy] = C[dx, dy]
-                inter[x + dx, y + dy] = C[dx, dy]
-
-    Image.fromarray(np.clip(stego, 0, 255).astype(np.uint8)).save(out_path)
-    return max_hide, Image.fromarray(np.clip(inter, 0, 255).astype(np.uint8))
-
-def extract(stego_path, msg_length):
-    stego_img = Image.open(stego_path)
-    stego = np.array(stego_img, dtype=int)
-    bits = ''
-    extracted = 0
-    M, N = stego.shape
-
-    for x in range(0, M - 2, 2):
-        for y in range(0, N - 2, 2):
-            Omin = np.min([stego[x, y], stego[x+2, y], stego[x, y+2], stego[x+2, y+2]])
-            Omax = np.max([stego[x, y], stego[x+2, y], stego[x, y+2], stego[x+2, y+2]])
-
-            C = np.zeros((2, 2), dtype=int)
-            C[0, 0] = stego[x, y]
-            C[0, 1] = (Omax + (stego[x, y] + stego[x, y+2]) // 2) // 2
-            C[1, 0] = (Omax + (stego[x, y] + stego[x+2, y]) // 2) // 2
-            C[1, 1] = (C[1, 0] + C[0, 1]) // 2
-
-            vk = [C[0, 1] - Omin, C[1, 0] - Omin, C[1, 1] - Omin]
-
-            for idx, (dx, dy) in enumerate([(0, 1), (1, 0), (1, 1)]):
-                ak = math.floor(math.log2(vk[idx])) if vk[idx] > 0 else 0
-                if ak > 0 and extracted + ak <= msg_length * 8:
-                    if (dx, dy) == (1, 1):
-                        ref = min(C[1, 0], C[0, 1])
-                    else:
-                        ref = max(stego[x, y], stego[x + 2*dx, y + 2*dy])
-
-                    Rk = ref - stego[x + dx, y + dy]
-                    if Rk < 0:
-                        Rk = 0
-                    bits += f'{Rk:0{ak}b}'
-                    extracted += ak
-
-                # Если мы достигли нужной длины (в битах), возвращаем результат
-                if extracted >= msg_length * 8:
-                    return from_bin(bits[:msg_length * 8])
-
-    return from_bin(bits[:msg_length * 8])
+from imnp import embed_file, extract
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from stegotools.batch import BatchWorker, default_workers
 
 class SteganographyApp(QWidget):
     def __init__(self):
@@ -113,6 +19,8 @@ class SteganographyApp(QWidget):
 
         self.selected_paths = []
         self.msg_length = 0
+        self.msg_lengths = {}
+        self.batch_worker = None
 
         layout = QVBoxLayout()
 
@@ -127,10 +35,24 @@ class SteganographyApp(QWidget):
         self.secret_msg_percentage.setPlaceholderText("Процент заполнения")
         layout.addWidget(self.secret_msg_percentage)
 
+        self.workers_input = QSpinBox()
+        self.workers_input.setRange(1, 256)
+        self.workers_input.setValue(default_workers())
+        self.workers_input.setPrefix("Процессов: ")
+        layout.addWidget(self.workers_input)
+
         self.embed_button = QPushButton("Встроить")
         self.embed_button.clicked.connect(self.embed_message)
         layout.addWidget(self.embed_button)
 
+        self.cancel_button = QPushButton("Отменить")
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.cancel_embed)
+        layout.addWidget(self.cancel_button)
+
+        self.progress_bar = QProgressBar()
+        layout.addWidget(self.progress_bar)
+
         self.extract_button = QPushButton("Извлечь")
         self.extract_button.clicked.connect(self.extract_message)
         layout.addWidget(self.extract_button)
@@ -155,45 +77,58 @@ class SteganographyApp(QWidget):
                 "\n".join(paths)
             )
 
-    def get_stego_text_chunk(self, container_bits: int) -> str:
-        self.target_bits = int(container_bits * (int(self.secret_msg_percentage.text()) / 100))
-        target_bytes = self.target_bits // 8  # 1 символ = 1 байт
-        
-        return self.book[:target_bytes]
-
     def embed_message(self):
         if not self.selected_paths:
             self.info_output.setText("Сначала выберите изображения.")
             return
 
-        results = []
-        for path in self.selected_paths:
-            try:
-                filename, ext = os.path.splitext(path)
-                stego_path = f"{filename}_stego_lab4_{self.secret_msg_percentage.text()}{ext}"
-
-                max_hide, _ = hide(path, self.book, stego_path)
-                secret_msg = self.get_stego_text_chunk(max_hide)
-                self.msg_length = len(secret_msg)
-                _, inter_img = hide(path, secret_msg, stego_path)
+        percentage = self.secret_msg_percentage.text()
+        try:
+            int(percentage)
+        except ValueError:
+            self.info_output.setText("Процент заполнения должен быть целым числом.")
+            return
 
-                stego_img = Image.open(stego_path)
-                psnr_val = psnr(inter_img, stego_img)
+        self.info_output.setText("Встраивание. Результаты:\n")
+        self.batch_worker = BatchWorker(embed_file, self.selected_paths, (self.book, percentage),
+                                        self.workers_input.value(), self)
+        self.batch_worker.result_ready.connect(self.on_file_embedded)
+        self.batch_worker.error.connect(self.on_file_failed)
+        self.batch_worker.progress.connect(self.on_progress)
+        self.batch_worker.finished.connect(self.on_embed_finished)
+        self.embed_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        self.batch_worker.start()
+
+    def cancel_embed(self):
+        if self.batch_worker is not None:
+            self.batch_worker.cancel()
+
+    def on_progress(self, done, total):
+        self.progress_bar.setMaximum(total)
+        self.progress_bar.setValue(done)
+
+    def on_file_embedded(self, path, result):
+        stego_path, psnr_val, target_bits, msg_length = result
+        self.msg_length = msg_length
+        self.msg_lengths[path] = msg_length
+        self.info_output.append(
+            f"Файл: {path}\n"
+            f"Стего: {stego_path}\n"
+            f"PSNR: {psnr_val:.2f} dB\n"
+            f"Встроено: {target_bits} бит\n"
+        )
 
-                results.append(
-                    f"Файл: {path}\n"
-                    f"Стего: {stego_path}\n"
-                    f"PSNR: {psnr_val:.2f} dB\n"
-                    f"Встроено: {self.target_bits} бит\n"
-                )
-            except Exception as e:
-                results.append(
-                    f"Ошибка при встраивании в файл {path}: {str(e)}\n"
-                )
+    def on_file_failed(self, path, message):
+        self.info_output.append(f"Ошибка при встраивании в файл {path}: {message}\n")
 
-        self.info_output.setText(
-            "Встраивание завершено. Результаты:\n\n" + "\n".join(results)
-        )
+    def on_embed_finished(self):
+        cancelled = self.batch_worker.cancelled
+        self.batch_worker.deleteLater()
+        self.batch_worker = None
+        self.embed_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
+        self.info_output.append("Встраивание отменено." if cancelled else "Встраивание завершено.")
 
     def extract_message(self):
         if not self.selected_paths:
@@ -210,7 +145,7 @@ class SteganographyApp(QWidget):
                 filename, ext = os.path.splitext(path)
                 stego_path = f"{filename}_stego_lab4_{self.secret_msg_percentage.text()}{ext}"
 
-                extracted = extract(stego_path, self.msg_length)
+                extracted = extract(stego_path, self.msg_lengths.get(path, self.msg_length))
                 results.append(f"Файл: {stego_path}\nИзвлечённое сообщение: {extracted}\n")
             except Exception as e:
                 results.append(f"Ошибка при извлечении из файла {path}: {str(e)}\n")
@@ -0,0 +1,75 @@
+import time
+from contextlib import contextmanager
+
+import numpy as np
+from PIL import Image
+
+from detectors import aump, chi_square_blocks, pairs_chi_square_blocks, rs_average
+
+# Стегоанализ одного изображения всеми детекторами без Qt.
+# Изображение декодируется один раз в массив (высота, ширина, RGB); хи-квадрат и AUMP
+# берут один и тот же канал CHANNEL из этого буфера, RS-анализ - все три канала.
+# Время каждого этапа (включая декодирование) накапливается в timings.
+
+CHANNEL = 0  # красный
+CHI_LIMIT = 60000.0
+STAGES = ("decode", "chi", "pairs", "rs", "aump")
+
+
+class AnalysisContext:
+    def __init__(self, path: str):
+        self.path = path
+        self.timings = {}
+        with self.stage("decode"):
+            self.rgb = np.asarray(Image.open(path).convert("RGB"))
+        self.channel = self.rgb[..., CHANNEL]
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def chi_square(self, block_size: int = 16) -> float:
+        # Среднее по строкам блоков отклонение от равномерной гистограммы, выбросы выше CHI_LIMIT отбрасываются
+        with self.stage("chi"):
+            row_means = chi_square_blocks(self.channel, block_size).mean(axis=1)
+            return float(row_means[row_means <= CHI_LIMIT].mean())
+
+    def pairs(self, block_size: int = 16) -> float:
+        # Средняя по блокам вероятность встраивания (хи-квадрат по парам значений)
+        with self.stage("pairs"):
+            return float(pairs_chi_square_blocks(self.channel, block_size)[2].mean())
+
+    def rs(self) -> float:
+        with self.stage("rs"):
+            return rs_average(self.rgb)
+
+    def aump(self, m: int = 16, d: int = 2) -> float:
+        with self.stage("aump"):
+            return abs(aump(self.channel, m, d))
+
+    def run(self, block_size: int = 16, m: int = 16, d: int = 2) -> dict:
+        return {
+            "path": self.path,
+            "chi": self.chi_square(block_size),
+            "pairs": self.pairs(block_size),
+            "rs": self.rs(),
+            "aump": self.aump(m, d),
+            "timings": self.timings,
+        }
+
+
+def analyze_file(path: str, block_size: int = 16, m: int = 16, d: int = 2) -> dict:
+    return AnalysisContext(path).run(block_size, m, d)
+
+
+def total_timings(results) -> dict:
+    # Суммарное время этапов по всем изображениям прогона
+    totals = dict.fromkeys(STAGES, 0.0)
+    for result in results:
+        for name, seconds in result["timings"].items():
+            totals[name] = totals.get(name, 0.0) + seconds
+    return totals
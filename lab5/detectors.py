@@ -0,0 +1,311 @@
+import math
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+# Детекторы стегоанализа без Qt: работают с массивом значений одного канала (0..255).
+
+
+def block_histograms(arr: np.ndarray, block_size: int = 16) -> np.ndarray:
+    # 256-корзинные гистограммы всех блоков block_size x block_size одним np.bincount:
+    # индекс = номер блока * 256 + значение. -> (строки блоков, столбцы блоков, 256)
+    h, w = arr.shape
+    rows, cols = h // block_size, w // block_size
+    blocks = np.asarray(arr[:rows * block_size, :cols * block_size]).reshape(rows, block_size, cols, block_size)
+    base = (np.arange(rows * cols, dtype=np.int64) * 256).reshape(rows, 1, cols, 1)
+    sentinel = rows * cols * 256
+    if blocks.dtype == np.uint8:
+        index = blocks + base
+    else:
+        # как np.histogram с range=(0, 256): 256 попадает в последнюю корзину, остальные
+        # значения вне диапазона - в лишнюю корзину в конце, которая отбрасывается
+        values = blocks.astype(np.int64)
+        index = np.where((values >= 0) & (values <= 256), np.minimum(values, 255) + base, sentinel)
+    counts = np.bincount(index.reshape(-1), minlength=sentinel + 1)[:sentinel]
+    return counts.reshape(rows, cols, 256)
+
+
+def chi_square_blocks(arr: np.ndarray, block_size: int = 16) -> np.ndarray:
+    # Отклонение гистограммы блока от равномерной (прежний вывод lab5):
+    # sum((o - e)^2 / e) = (sum(o^2) - 2 * e * sum(o) + 256 * e^2) / e
+    observed = block_histograms(arr, block_size)
+    expected = block_size * block_size / 256
+    squares = np.einsum("ijk,ijk->ij", observed, observed)
+    return (squares - 2 * expected * observed.sum(axis=-1) + 256 * expected ** 2) / expected
+
+
+def _gammainc_upper(a: np.ndarray, x: np.ndarray, iterations: int = 200) -> np.ndarray:
+    # Регуляризованная верхняя неполная гамма-функция Q(a, x) для a > 0, x >= 0:
+    # ряд при x < a + 1, иначе цепная дробь (метод Лентца), все элементы сразу
+    a, x = np.broadcast_arrays(np.asarray(a, dtype=float), np.asarray(x, dtype=float))
+    tiny = 1e-300
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        log_prefix = -x + a * np.log(np.where(x > 0, x, 1)) - np.vectorize(math.lgamma, otypes=[float])(a)
+        prefix = np.where(x > 0, np.exp(log_prefix), 0.0)
+
+        ap = a.copy()
+        term = 1 / a
+        total = term.copy()
+        for _ in range(iterations):
+            ap += 1
+            term = term * x / ap
+            total += term
+        lower = total * prefix
+
+        b = x + 1 - a
+        c = np.full_like(x, 1 / tiny)
+        d = 1 / np.where(np.abs(b) < tiny, tiny, b)
+        h = d.copy()
+        for i in range(1, iterations + 1):
+            an = -i * (i - a)
+            b = b + 2
+            d = an * d + b
+            d = 1 / np.where(np.abs(d) < tiny, tiny, d)
+            c = b + an / c
+            c = np.where(np.abs(c) < tiny, tiny, c)
+            h *= d * c
+        upper = prefix * h
+    return np.clip(np.where(x < a + 1, 1 - lower, upper), 0.0, 1.0)
+
+
+def pairs_chi_square_blocks(arr: np.ndarray, block_size: int = 16) -> tuple:
+    # Атака Вестфельда-Пфитцмана по парам значений (2k, 2k + 1): при встраивании в LSB частоты
+    # внутри пары выравниваются. -> (статистика, степени свободы, вероятность встраивания) по блокам
+    observed = block_histograms(arr, block_size)
+    observed = observed.reshape(observed.shape[:2] + (128, 2))
+    expected = observed.sum(axis=-1) / 2
+    used = expected > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        terms = np.where(used, (observed[..., 0] - expected) ** 2 / expected, 0.0)
+    chi = terms.sum(axis=-1)
+    dof = used.sum(axis=-1) - 1
+    p = np.where(dof > 0, _gammainc_upper(np.maximum(dof, 1) / 2, chi / 2), 0.0)
+    return chi, dof, p
+
+
+
+# Проекция на полиномы степени d в блоке из m отсчетов зависит только от (m, d):
+# hat = H (H^T H)^-1 H^T, предсказание всех блоков - одно умножение hat @ Y.
+# dof - число степеней свободы остатка (m - d - 1). Кэш общий для всех изображений процесса.
+AumpProjection = namedtuple("AumpProjection", "H hat dof")
+
+
+@lru_cache(maxsize=32)
+def aump_projection(m: int, d: int) -> AumpProjection:
+    q = d + 1
+    if m <= q:
+        raise ValueError("Длина блока AUMP должна быть больше d + 1")
+    x_vals = np.linspace(1 / m, 1, m)
+    H = x_vals[:, np.newaxis] ** np.arange(q)
+    hat = H @ np.linalg.pinv(H)
+    # кэшированные матрицы не должны меняться вызывающим кодом
+    H.setflags(write=False)
+    hat.setflags(write=False)
+    return AumpProjection(H, hat, m - q)
+
+
+def pred_aump(X: np.ndarray, m: int, d: int, projection: AumpProjection = None) -> tuple:
+    # Полиномиальное предсказание (степень d) по блокам из m подряд идущих пикселей (построчный обход).
+    # Блоки - столбцы матрицы Y (m, Kn), получаемой reshape без циклов по пикселям.
+    # Хвост изображения, не заполняющий целый блок, предсказывается самим собой с нулевым весом.
+    sig_th = 1.0
+    projection = projection or aump_projection(m, d)
+    flat = X.reshape(-1)
+    Kn = flat.size // m
+    Y = flat[:Kn * m].reshape(Kn, m).T
+    Ypred = projection.hat @ Y
+
+    sig2 = np.sum((Y - Ypred) ** 2, axis=0) / projection.dof
+    sig2 = np.maximum(sig_th ** 2, sig2)
+    s_n2 = Kn / np.sum(1.0 / sig2)
+    w_block = np.sqrt(s_n2 / (Kn * projection.dof)) / sig2
+
+    Xpred = np.array(X, dtype=np.float64)
+    Xpred.reshape(-1)[:Kn * m] = Ypred.T.reshape(-1)
+    w_full = np.zeros(X.shape)
+    w_full.reshape(-1)[:Kn * m] = np.repeat(w_block, m)
+    return Xpred, w_full
+
+
+def aump(X: np.ndarray, m: int = 16, d: int = 2) -> float:
+    # AUMP-статистика beta для LSB-замены
+    X = np.asarray(X, dtype=np.float64)
+    Xpred, w = pred_aump(X, m, d)
+    r = X - Xpred
+    Xbar = X + 1 - 2 * (X.astype(int) % 2)
+    return float(np.sum(w * (X - Xbar) * r))
+
+
+# RS-анализ (Fridrich, Goljan, Du) - перенос RSAnalysis.java (Digital Invisible Ink Toolkit)
+# с теми же масками, функциями переворота и решением getX, но сразу для всех групп:
+# группы пикселей - столбцы массива (m * n, число позиций), собираемого срезами канала.
+
+RS_RESULT_NAMES = [
+    "Number of regular groups (positive)",
+    "Number of singular groups (positive)",
+    "Number of regular groups (negative)",
+    "Number of singular groups (negative)",
+    "Difference for regular groups",
+    "Difference for singular groups",
+    "Percentage of regular groups (positive)",
+    "Percentage of singular groups (positive)",
+    "Percentage of regular groups (negative)",
+    "Percentage of singular groups (negative)",
+    "Difference for regular groups %",
+    "Difference for singular groups %",
+    "Number of regular groups (positive for all flipped)",
+    "Number of singular groups (positive for all flipped)",
+    "Number of regular groups (negative for all flipped)",
+    "Number of singular groups (negative for all flipped)",
+    "Difference for regular groups (all flipped)",
+    "Difference for singular groups (all flipped)",
+    "Percentage of regular groups (positive for all flipped)",
+    "Percentage of singular groups (positive for all flipped)",
+    "Percentage of regular groups (negative for all flipped)",
+    "Percentage of singular groups (negative for all flipped)",
+    "Difference for regular groups (all flipped) %",
+    "Difference for singular groups (all flipped) %",
+    "Total number of groups",
+    "Estimated percent of flipped pixels",
+    "Estimated message length (in percent of pixels)(p)",
+    "Estimated message length (in bytes)",
+]
+# строк позиций групп в одной порции (ограничивает память на больших изображениях)
+RS_BAND_ROWS = 256
+
+
+def rs_masks(m: int = 2, n: int = 2) -> np.ndarray:
+    # Две маски m x n (построчно): шахматная с 1 в (0, 0) и обратная к ней
+    i, j = np.divmod(np.arange(m * n), m)
+    first = (i % 2) == (j % 2)
+    return np.stack([first, ~first])
+
+
+def _flip_positive(v: np.ndarray) -> np.ndarray:
+    # F1: 0 <-> 1, 2 <-> 3, ... (negateLSB)
+    return v ^ 1
+
+
+def _flip_negative(v: np.ndarray) -> np.ndarray:
+    # F-1: -1 <-> 0, 1 <-> 2, ..., 255 <-> 256 (invertLSB)
+    return ((v + 1) ^ 1) - 1
+
+
+def _variation(groups: np.ndarray) -> np.ndarray:
+    # |x0 - x1| + |x3 - x2| + |x1 - x3| + |x2 - x0| по каждой четверке подряд идущих пикселей группы
+    total = np.zeros(groups.shape[1:], dtype=np.int32)
+    for k in range(0, groups.shape[0], 4):
+        g0, g1, g2, g3 = groups[k:k + 4]
+        total += np.abs(g0 - g1) + np.abs(g3 - g2) + np.abs(g1 - g3) + np.abs(g2 - g0)
+    return total
+
+
+def _rs_band_counts(groups: np.ndarray, masks: np.ndarray) -> np.ndarray:
+    # -> [R, S, R-, S-, U] для исходных групп и те же для групп с перевернутыми LSB всех пикселей
+    counts = np.zeros((2, 5), dtype=np.int64)
+    for row, base in enumerate((groups, _flip_positive(groups))):
+        variation_b = _variation(base)
+        for mask in masks:
+            mask = mask.reshape((-1,) + (1,) * (base.ndim - 1))
+            variation_p = _variation(np.where(mask, _flip_positive(base), base))
+            variation_n = _variation(np.where(mask, _flip_negative(base), base))
+            counts[row] += [
+                np.count_nonzero(variation_p > variation_b),
+                np.count_nonzero(variation_p < variation_b),
+                np.count_nonzero(variation_n > variation_b),
+                np.count_nonzero(variation_n < variation_b),
+                np.count_nonzero(variation_p == variation_b),
+            ]
+    return counts
+
+
+def rs_counts(channel: np.ndarray, m: int = 2, n: int = 2, overlap: bool = True) -> np.ndarray:
+    # Подсчет групп по всем позициям, которые обходит RSAnalysis.doAnalysis:
+    # левые верхние углы x < ширина - 1, y < высота - 1 с шагом 1 (overlap) или m, n.
+    if (m * n) % 4:
+        raise ValueError("Размер маски RS должен быть кратен 4")
+    height, width = channel.shape
+    if width < max(m, 2) or height < max(n, 2):
+        raise ValueError("Изображение меньше маски RS")
+    step_x, step_y = (1, 1) if overlap else (m, n)
+    # позиции, для которых группа целиком лежит в изображении (для масок 2x2 - все позиции Java)
+    xs = np.arange(0, min(width - 1, width - m + 1), step_x)
+    ys = np.arange(0, min(height - 1, height - n + 1), step_y)
+    values = np.asarray(channel, dtype=np.int16)
+    masks = rs_masks(m, n)
+
+    counts = np.zeros((2, 5), dtype=np.int64)
+    for start in range(0, len(ys), RS_BAND_ROWS):
+        band_ys = ys[start:start + RS_BAND_ROWS]
+        rows = band_ys[:, np.newaxis] + np.arange(n)[np.newaxis, :]
+        cols = xs[:, np.newaxis] + np.arange(m)[np.newaxis, :]
+        # (m * n, строки позиций, столбцы позиций), порядок пикселей группы - построчно
+        groups = values[rows[:, :, np.newaxis, np.newaxis], cols[np.newaxis, np.newaxis, :, :]]
+        groups = groups.transpose(1, 3, 0, 2).reshape(m * n, len(band_ys), len(xs))
+        counts += _rs_band_counts(groups, masks)
+    return counts
+
+
+def rs_x(r, rm, r1, rm1, s, sm, s1, sm1) -> float:
+    # Корень уравнения 2(d1 + d0)x^2 + (d-0 - d-1 - d1 - 3d0)x + d0 - d-0 = 0 - дословно getX из Java,
+    # включая деление на ноль (inf/nan, как у double в Java)
+    r, rm, r1, rm1, s, sm, s1, sm1 = map(np.float64, (r, rm, r1, rm1, s, sm, s1, sm1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x = np.float64(0)
+        dzero = r - s
+        dminuszero = rm - sm
+        done = r1 - s1
+        dminusone = rm1 - sm1
+        a = 2 * (done + dzero)
+        b = dminuszero - dminusone - done - (3 * dzero)
+        c = dzero - dminuszero
+        if a == 0:
+            x = c / b
+        discriminant = b * b - (4 * a * c)
+        if discriminant >= 0:
+            rootpos = ((-1 * b) + np.sqrt(discriminant)) / (2 * a)
+            rootneg = ((-1 * b) - np.sqrt(discriminant)) / (2 * a)
+            x = rootpos if abs(rootpos) <= abs(rootneg) else rootneg
+        else:
+            cr = (rm - r) / (r1 - r + rm - rm1)
+            cs = (sm - s) / (s1 - s + sm - sm1)
+            x = (cr + cs) / 2
+        if x == 0:
+            ar = ((rm1 - r1 + r - rm) + (rm - r) / x) / (x - 1)
+            as_ = ((sm1 - s1 + s - sm) + (sm - s) / x) / (x - 1)
+            if as_ > 0 or ar < 0:
+                cr = (rm - r) / (r1 - r + rm - rm1)
+                cs = (sm - s) / (s1 - s + sm - sm1)
+                x = (cr + cs) / 2
+    return float(x)
+
+
+def rs_analysis(channel: np.ndarray, m: int = 2, n: int = 2, overlap: bool = True) -> np.ndarray:
+    # 28 показателей в порядке RS_RESULT_NAMES (как double[] doAnalysis)
+    height, width = channel.shape
+    counts = rs_counts(channel, m, n, overlap).astype(np.float64)
+    (r, s, rn, sn, unusable), (r1, s1, rn1, sn1, _) = counts
+    total = r + s + unusable
+    x = rs_x(r, rn, r1, rn1, s, sn, s1, sn1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        epf = 0.0 if 2 * (x - 1) == 0 else abs(np.float64(x) / (2 * (x - 1)))
+        ml = 0.0 if x - 0.5 == 0 else abs(np.float64(x) / (x - 0.5))
+        results = np.array([
+            r, s, rn, sn, abs(r - rn), abs(s - sn),
+            r / total * 100, s / total * 100, rn / total * 100, sn / total * 100,
+            abs(r - rn) / total * 100, abs(s - sn) / total * 100,
+            r1, s1, rn1, sn1, abs(r1 - s1), abs(rn1 - sn1),
+            r1 / total * 100, s1 / total * 100, rn1 / total * 100, sn1 / total * 100,
+            abs(r1 - s1) / total * 100, abs(rn1 - sn1) / total * 100,
+            total, epf, ml, width * height * 3 * ml / 8,
+        ])
+    return results
+
+
+def rs_average(rgb: np.ndarray, m: int = 2, n: int = 2, overlap: bool = True) -> float:
+    # "Average result" из RSAnalysis.main: оценка длины сообщения, усредненная по R, G, B.
+    # Полутоновое изображение (2D) анализируется как три одинаковых канала.
+    if rgb.ndim == 2:
+        return float(rs_analysis(rgb, m, n, overlap)[26])
+    return float(np.mean([rs_analysis(rgb[..., c], m, n, overlap)[26] for c in range(3)]))
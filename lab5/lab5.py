@@ -1,94 +1,34 @@
 import sys
 from PyQt5.QtWidgets import (
     QApplication, QLabel, QVBoxLayout, QHBoxLayout, QPushButton, QWidget,
-    QRadioButton, QFileDialog, QMessageBox, QGroupBox, QScrollArea, QFrame, QTextEdit
+    QRadioButton, QFileDialog, QMessageBox, QGroupBox, QScrollArea, QFrame, QTextEdit,
+    QSpinBox, QProgressBar
 )
-from PyQt5.QtGui import QPixmap, QPainter, QColor, QImage
+from PyQt5.QtGui import QPixmap, QPainter, QColor
 from PyQt5.QtCore import Qt, QRect
-from PIL import Image
-import math
-import numpy as np
 import os
 
-import subprocess
-
-def run_java_analysis(image_path):
-    java_class_path = "/Users/revolution/Steganography/lab5"
-    java_class = "RSAnalysis"
-    
-    try:
-        result = subprocess.run(
-            ["java" , "-cp", java_class_path, java_class, image_path],
-            capture_output=True,
-            text=True
-        )
-
-        if result.returncode == 0:
-            return result.stdout
-        else:
-            print("Error executing Java program")
-            print(result.stderr)
-
-    except Exception as e:
-        print(f"Error executing the Java program: {e}")
-
-def image_to_array(image: QImage) -> np.ndarray:
-    width, height = image.width(), image.height()
-    ptr = image.bits()
-    ptr.setsize(image.bytesPerLine() * height)
-    
-    if image.format() in [QImage.Format.Format_RGBA8888, QImage.Format.Format_ARGB32]:
-        arr = np.array(ptr).reshape(height, width, 4)
-        return arr[:, :, 2]
-    elif image.format() == QImage.Format.Format_Grayscale8:
-        arr = np.array(ptr).reshape(height, width)
-        return arr
-    else:
-        converted = image.convertToFormat(QImage.Format.Format_RGBA8888)
-        ptr = converted.bits()
-        ptr.setsize(converted.bytesPerLine() * converted.height())
-        arr = np.array(ptr).reshape(converted.height(), converted.width(), 4)
-        return arr[:, :, 2]
-
-def pred_aump(X: np.ndarray, m: int, d: int) -> tuple:
-        sig_th = 1.0
-        q = d + 1
-        h, w_img = X.shape
-        Kn = (h * w_img) // m
-        H = np.zeros((m, q))
-        x_vals = np.linspace(1/m, 1, m)
-        for i in range(q):
-            H[:, i] = x_vals ** i
-        Y = np.zeros((m, Kn))
-        count = 0
-        for i in range(h):
-            for j in range(w_img):
-                block_idx = count // m
-                row_in_block = count % m
-                Y[row_in_block, block_idx] = X[i, j]
-                count += 1
-        p = np.linalg.lstsq(H, Y, rcond=None)[0]
-        Ypred = H @ p
-        Xpred = np.zeros_like(X)
-        count = 0
-        for i in range(h):
-            for j in range(w_img):
-                block_idx = count // m
-                row_in_block = count % m
-                Xpred[i, j] = Ypred[row_in_block, block_idx]
-                count += 1
-        sig2 = np.sum((Y - Ypred) ** 2, axis=0) / (m - q)
-        sig2 = np.maximum(sig_th ** 2, sig2)
-        s_n2 = Kn / np.sum(1.0 / sig2)
-        w_block = np.sqrt(s_n2 / (Kn * (m - q))) / sig2
-        w_full = np.zeros_like(X)
-        count = 0
-        for i in range(h):
-            for j in range(w_img):
-                block_idx = count // m
-                w_full[i, j] = w_block[block_idx]
-                count += 1
-        return Xpred, w_full
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from stegotools.bitplanes import bit_plane, load_pixels
+from stegotools.batch import BatchWorker, default_workers
+from stegotools.qtimage import plane_to_qimage, scaled_pixmap
+from analysis import STAGES, analyze_file, total_timings
+
+STAGE_NAMES = {
+    "decode": "декодирование",
+    "chi": "хи-квадрат",
+    "pairs": "хи-квадрат по парам",
+    "rs": "RS-анализ",
+    "aump": "AUMP",
+}
+
+def format_report(result) -> str:
+    return (f"Результаты стегоанализа для {result['path']}:\n"
+            f"Хи-квадрат (среднее по всем блокам): {result['chi']:.4f}\n"
+            f"Хи-квадрат по парам значений (вероятность встраивания): {result['pairs']:.4f}\n"
+            # экспонента заглавной E, как в выводе Java, - ее ожидает разбор отчетов в lab6
+            f"RS-анализ: {str(result['rs']).upper()}\n"
+            f"AUMP-показатель: {result['aump']:.4f}\n\n")
 
 class BitImageVisualizer(QWidget):
     def __init__(self):
@@ -96,35 +36,11 @@ class BitImageVisualizer(QWidget):
         self.selected_image_paths = []
         self.selected_bit = 0
         self.changed_images = []
+        self.analysis_worker = None
+        self.analysis_paths = []
+        self.analysis_results = {}
         self.initUI()
     
-    def chi_square_analysis(self, image_path, block_size: int = 16) -> np.ndarray:
-        image = QImage(image_path)
-        arr = image_to_array(image)
-        h, w = arr.shape
-        rows, cols = h // block_size, w // block_size
-        chi_values = np.zeros((rows, cols))
-        for i in range(rows):
-            for j in range(cols):
-                block = arr[i*block_size:(i+1)*block_size, j*block_size:(j+1)*block_size]
-                observed, _ = np.histogram(block, bins=256, range=(0, 256))
-                expected = np.full(observed.shape, block.size / 256)
-                chi_values[i, j] = np.sum((observed - expected) ** 2 / expected)
-        return chi_values
-
-    def aump_analysis(self, image_path, m: int = 16, d: int = 2) -> float:
-        image = QImage(image_path)
-        arr = np.zeros((image.height(), image.width()), dtype=np.float64)
-        for y in range(image.height()):
-            for x in range(image.width()):
-                arr[y, x] = QColor(image.pixel(x, y)).red()
-        X = arr.copy()
-        Xpred, w = pred_aump(X, m, d)
-        r = X - Xpred
-        Xbar = X + 1 - 2 * (X.astype(int) % 2)
-        beta = np.sum(w * (X - Xbar) * r)
-        return beta
-    
     def initUI(self):
         self.setWindowTitle("Методы анализа контейнеров")
         self.resize(800, 600)
@@ -181,8 +97,22 @@ class BitImageVisualizer(QWidget):
         self.analysis_button.clicked.connect(self.run_stego_analysis)
         button_layout.addWidget(self.analysis_button)
 
+        self.cancel_button = QPushButton("Отменить")
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.cancel_stego_analysis)
+        button_layout.addWidget(self.cancel_button)
+
+        self.workers_input = QSpinBox()
+        self.workers_input.setRange(1, 256)
+        self.workers_input.setValue(default_workers())
+        self.workers_input.setPrefix("Процессов: ")
+        button_layout.addWidget(self.workers_input)
+
         main_layout.addLayout(button_layout)
 
+        self.progress_bar = QProgressBar()
+        main_layout.addWidget(self.progress_bar)
+
     def create_bit_selection_layout(self, main_layout):
         bit_groupbox = QGroupBox("Выбор битов")
         bit_groupbox.setFixedSize(340, 120)
@@ -254,24 +184,15 @@ class BitImageVisualizer(QWidget):
             if widget is not None:
                 widget.deleteLater()
 
-        i = 1
+        self.changed_images = []
         for image_path in self.selected_image_paths:
-            img = Image.open(image_path)
-            width, height = img.size
-            new_image = Image.new("1", (width, height))
-            for x in range(width):
-                for y in range(height):
-                    pixel = img.getpixel((x, y))
-                    lsb = (pixel >> self.selected_bit) & 1
-                    new_image.putpixel((x, y), 255 if lsb == 1 else 0)
-
-            self.changed_images.append(new_image)
-            self.display_changed_image(new_image, i)
-            i = i + 1
-
-    def display_changed_image(self, image, i):
-        image.save("temp_changed_image" + str(i) + ".bmp", "BMP")
-        pixmap = QPixmap("temp_changed_image" + str(i) + ".bmp").scaled(300, 300, aspectRatioMode=True)
+            plane = bit_plane(load_pixels(image_path), self.selected_bit)
+
+            self.changed_images.append(plane)
+            self.display_changed_image(plane)
+
+    def display_changed_image(self, plane):
+        pixmap = scaled_pixmap(plane_to_qimage(plane))
 
         new_label = QLabel()
         new_label.setPixmap(pixmap)
@@ -282,48 +203,57 @@ class BitImageVisualizer(QWidget):
             QMessageBox.warning(self, "Ошибка", "Сначала выберите изображения!")
             return
 
-        results = []
-        elements_1 = np.array([])
-        elements_2 = np.array([])
-        elements_3 = np.array([])
-
-        for image_path in self.selected_image_paths:
-            chi_val = self.chi_square_analysis(image_path)
-
-            chi_mas = np.array([sub_arr.mean() for sub_arr in chi_val])
-            filtered_chi_mas = chi_mas[chi_mas <= 60000.0]
-
-            rs_val = run_java_analysis(image_path)
-
-            start_index = rs_val.find("Average result: ")
-            end_index = rs_val.find("\n", start_index)
-            rs_val = rs_val[start_index:end_index]
-            rs_val = rs_val.split("Average result: ")[1].split()[0]
-
-            aump_val = self.aump_analysis(image_path)
-
-            self.info_output.append(
-                      f"Результаты стегоанализа для {image_path}:\n"
-                      f"Хи-квадрат (среднее по всем блокам): {filtered_chi_mas.mean():.4f}\n"
-                      #f"Хи-квадрат (cреднее значение в каждом блоке): \n{np.array([sub_arr.mean() for sub_arr in filtered_chi_mas])}\n"
-                      f"RS-анализ: {rs_val}\n"
-                      f"AUMP-показатель: {abs(aump_val):.4f}\n\n"
-            )
-
-            result = (f"Результаты стегоанализа для {image_path}:\n"
-                      f"Хи-квадрат (среднее по всем блокам): {filtered_chi_mas.mean():.4f}\n"
-                      #f"Хи-квадрат (cреднее значение в каждом блоке): \n{np.array([sub_arr.mean() for sub_arr in filtered_chi_mas])}\n"
-                      f"RS-анализ: {rs_val}\n"
-                      f"AUMP-показатель: {abs(aump_val):.4f}\n\n")
-            results.append(result)
-
-            elements_1 = np.append(elements_1, filtered_chi_mas.mean())
-            elements_2 = np.append(elements_2, float(rs_val))
-            elements_3 = np.append(elements_3, abs(aump_val))
+        # Изображения анализируются в пуле процессов, окно не блокируется;
+        # результаты выводятся по мере готовности, сохранение - после завершения всего пакета
+        # список файлов запоминается: выбор новых изображений во время прогона не меняет отчет
+        self.analysis_paths = list(self.selected_image_paths)
+        self.analysis_results = {}
+        self.info_output.append("Стегоанализ. Результаты:\n")
+        self.analysis_worker = BatchWorker(analyze_file, self.analysis_paths,
+                                           workers=self.workers_input.value(), parent=self)
+        self.analysis_worker.result_ready.connect(self.on_image_analysed)
+        self.analysis_worker.error.connect(self.on_image_failed)
+        self.analysis_worker.progress.connect(self.on_progress)
+        self.analysis_worker.finished.connect(self.on_analysis_finished)
+        self.analysis_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        self.analysis_worker.start()
+
+    def cancel_stego_analysis(self):
+        if self.analysis_worker is not None:
+            self.analysis_worker.cancel()
+
+    def on_progress(self, done, total):
+        self.progress_bar.setMaximum(total)
+        self.progress_bar.setValue(done)
+
+    def on_image_analysed(self, path, result):
+        self.analysis_results[path] = result
+        self.info_output.append(format_report(result))
+
+    def on_image_failed(self, path, message):
+        self.info_output.append(f"Ошибка при анализе файла {path}: {message}\n")
+
+    def on_analysis_finished(self):
+        cancelled = self.analysis_worker.cancelled
+        self.analysis_worker.deleteLater()
+        self.analysis_worker = None
+        self.analysis_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
+        self.info_output.append("Стегоанализ отменен." if cancelled else "Стегоанализ завершен.")
+
+        # отчет - в порядке выбора файлов, независимо от порядка завершения
+        results = [self.analysis_results[path] for path in self.analysis_paths
+                   if path in self.analysis_results]
+        if not results:
+            return
 
-        print(np.sort(elements_1))
-        print(np.sort(elements_2))
-        print(np.sort(elements_3))
+        totals = total_timings(results)
+        timing_report = "Время по этапам (сумма по процессам), с: " + ", ".join(
+            f"{STAGE_NAMES[name]} {totals[name]:.3f}" for name in STAGES
+        ) + "\n"
+        # в файл отчета время не пишется - его формат разбирает lab6
+        self.info_output.append(timing_report)
 
         save_path, _ = QFileDialog.getSaveFileName(
             self,
@@ -333,7 +263,7 @@ class BitImageVisualizer(QWidget):
         )
         if save_path:
             with open(save_path, "w") as f:
-                f.writelines(results)
+                f.writelines(format_report(result) for result in results)
             QMessageBox.information(self, "Анализ завершён", f"Результаты сохранены в {save_path}")
 
 if __name__ == "__main__":
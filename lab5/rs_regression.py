@@ -0,0 +1,57 @@
+import sys
+
+import numpy as np
+
+from detectors import rs_analysis
+
+# Регрессионная проверка RS-анализа (не сверка с Java): для фиксированных изображений 16 x 20
+# число регулярных/сингулярных групп и оценка длины сообщения (маски 2 x 2, с перекрытием и без)
+# должны оставаться такими, как записано в EXPECTED. Значения получены построчным переносом
+# doAnalysis/getAllPixelFlips/getX из RSAnalysis.java на Python, а не запуском самого Java-класса.
+# Запуск: python3 rs_regression.py  (код возврата 1 при расхождениях)
+
+HEIGHT, WIDTH = 16, 20
+
+
+def smooth():
+    y, x = np.mgrid[0:HEIGHT, 0:WIDTH]
+    return (x * 3 + y * 2 + (x * y) % 5) % 256
+
+
+def lsb_embedded():
+    y, x = np.mgrid[0:HEIGHT, 0:WIDTH]
+    return (smooth() & 0xFE) | ((x * 7 + y * 11 + x * y) % 3 == 0)
+
+
+def texture():
+    y, x = np.mgrid[0:HEIGHT, 0:WIDTH]
+    return (x * x * 5 + y * y * 3 + x * y * 7) % 256
+
+
+# (изображение, overlap) -> (R, S, R-, S-, R, S, R-, S- при перевернутых LSB, всего групп), длина сообщения
+EXPECTED = {
+    ("smooth", True): ((168, 87, 171, 84, 96, 162, 264, 48, 570), 0.03766630747840805),
+    ("smooth", False): ((26, 42, 66, 8, 40, 26, 52, 24, 160), 1.6625752921681871),
+    ("lsb_embedded", True): ((141, 120, 209, 64, 131, 128, 220, 59, 570), 0.6589312358146053),
+    ("lsb_embedded", False): ((44, 34, 60, 23, 41, 38, 65, 20, 160), 0.5),
+    ("texture", True): ((115, 104, 105, 114, 105, 114, 115, 104, 570), 19.04987562112102),
+    ("texture", False): ((34, 35, 35, 33, 35, 33, 34, 35, 160), 7.162277660168372),
+}
+IMAGES = {"smooth": smooth, "lsb_embedded": lsb_embedded, "texture": texture}
+COUNT_INDEXES = [0, 1, 2, 3, 12, 13, 14, 15, 24]
+
+
+def main():
+    failures = 0
+    for (name, overlap), (counts, length) in EXPECTED.items():
+        results = rs_analysis(IMAGES[name](), 2, 2, overlap)
+        got_counts = tuple(int(v) for v in results[COUNT_INDEXES])
+        if got_counts != counts or not np.isclose(results[26], length, rtol=1e-12, atol=0):
+            failures += 1
+            print(f"{name}, overlap={overlap}: {got_counts}, {results[26]!r} != {counts}, {length!r}")
+    print(f"Расхождений: {failures}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,4 @@
+import os
 import sys
 import numpy as np
 from PySide6.QtWidgets import (
@@ -5,8 +6,9 @@ from PySide6.QtWidgets import (
     QPushButton, QLineEdit, QTextEdit
 )
 from PySide6.QtGui import QRegularExpressionValidator
-import bitarray
-import bitarray.util
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from stegotools.codec import bits_to_text, encode_text, text_to_bits
 
 
 class Encoder:
@@ -25,8 +27,7 @@ class Encoder:
 
     @classmethod
     def encode_message(cls, source: str, message: str) -> tuple[int, str]:
-        msg_bits = bitarray.bitarray()
-        msg_bits.frombytes(message.encode("utf-8"))
+        msg_bits = text_to_bits(message).tolist()
         seed = np.random.randint(0, 20_000_000)
         chars = list(source)
         indices = np.random.RandomState(seed).permutation(len(chars)).tolist()
@@ -48,7 +49,7 @@ class Encoder:
 
     @classmethod
     def decode_message(cls, encoded_text: str, msg_length: int, seed: int) -> str:
-        msg_bits = bitarray.bitarray()
+        msg_bits = []
         indices = np.random.RandomState(seed).permutation(len(encoded_text)).tolist()
 
         for idx in indices:
@@ -61,7 +62,7 @@ class Encoder:
             if len(msg_bits) >= msg_length * 8:
                 break
 
-        return msg_bits[:msg_length*8].tobytes().decode("utf-8", "ignore")
+        return bits_to_text(msg_bits[:msg_length*8], "ignore")
 
 
 class ControlPanel(QWidget):
@@ -139,7 +140,8 @@ class MainWindow(QMainWindow):
             
             seed, result = Encoder.encode_message(source, message)
             self.controls.seed_input.setText(str(seed))
-            self.controls.msg_length_input.setText(str(len(message)))
+            # длина в байтах UTF-8 - столько байт читает decode_message
+            self.controls.msg_length_input.setText(str(len(encode_text(message))))
             self.result_editor.setPlainText(result)
         except Exception as e:
             self.result_editor.setPlainText(f"Encoding Error: {str(e)}")
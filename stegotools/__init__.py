@@ -0,0 +1 @@
+# Общий код для лабораторных работ (визуальная атака, кодирование сообщений и т.д.)
@@ -0,0 +1,72 @@
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+# Пакетная обработка файлов в пуле процессов.
+# func(item, *args) должна быть функцией верхнего уровня модуля без Qt, чтобы
+# ее можно было передать в дочерний процесс. Общие аргументы (например, текст книги)
+# передаются в каждый процесс один раз при его запуске.
+# Процессы запускаются через spawn: fork многопоточного Qt-приложения небезопасен.
+
+_args = ()
+
+
+def _init_worker(args):
+    global _args
+    _args = args
+
+
+def _run(func, item):
+    return func(item, *_args)
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+class BatchWorker(QThread):
+    # Результаты приходят по мере готовности файлов (в порядке завершения)
+    result_ready = pyqtSignal(object, object)
+    error = pyqtSignal(object, str)
+    progress = pyqtSignal(int, int)
+
+    def __init__(self, func, items, args=(), workers=None, parent=None):
+        super().__init__(parent)
+        self.func = func
+        self.items = list(items)
+        self.args = tuple(args)
+        self.workers = workers or default_workers()
+        self.cancelled = False
+
+    def cancel(self):
+        # Еще не начатые файлы отменяются; уже запущенные дорабатывают в фоне, их результаты отбрасываются
+        self.cancelled = True
+
+    def run(self):
+        total = len(self.items)
+        done = 0
+        self.progress.emit(done, total)
+        executor = ProcessPoolExecutor(
+            max_workers=min(self.workers, max(total, 1)),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.args,),
+        )
+        try:
+            futures = {executor.submit(_run, self.func, item): item for item in self.items}
+            pending = set(futures)
+            while pending and not self.cancelled:
+                finished, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    item = futures[future]
+                    try:
+                        self.result_ready.emit(item, future.result())
+                    except Exception as e:
+                        # ошибка одного файла не прерывает обработку остальных
+                        self.error.emit(item, str(e))
+                    done += 1
+                    self.progress.emit(done, total)
+        finally:
+            executor.shutdown(wait=not self.cancelled, cancel_futures=True)
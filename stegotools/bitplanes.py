@@ -0,0 +1,135 @@
+import argparse
+import os
+import sys
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+from stegotools.tiled import DEFAULT_TILE_ROWS, write_bit_planes_tiled
+
+
+def load_pixels(path) -> np.ndarray:
+    # Однократное декодирование изображения в массив (цветные переводятся в оттенки серого).
+    # 1-битные изображения тоже переводятся в "L" (0/255): иначе массив bool дал бы одну плоскость вместо восьми
+    img = Image.open(path)
+    if img.mode not in ("L", "P", "I", "I;16", "I;16B", "I;16L"):
+        img = img.convert("L")
+    return np.asarray(img)
+
+
+def bit_depth(arr: np.ndarray) -> int:
+    if arr.dtype == np.bool_:
+        return 1
+    return arr.dtype.itemsize * 8
+
+
+def bit_plane(arr: np.ndarray, bit: int) -> np.ndarray:
+    # Одна битовая плоскость: значения 0/1
+    return ((arr >> bit) & 1).astype(np.uint8)
+
+
+def all_bit_planes(arr: np.ndarray) -> np.ndarray:
+    # Все битовые плоскости за один проход, форма (bits, h, w); плоскость k = (arr >> k) & 1
+    if arr.dtype == np.uint8:
+        planes = np.unpackbits(arr[..., np.newaxis], axis=-1, bitorder="little")
+        return np.moveaxis(planes, -1, 0)
+    shifts = np.arange(bit_depth(arr), dtype=arr.dtype).reshape(-1, 1, 1)
+    return ((arr[np.newaxis] >> shifts) & 1).astype(np.uint8)
+
+
+def plane_to_image(plane: np.ndarray) -> Image.Image:
+    # Плоскость -> черно-белое изображение в режиме "1"
+    return Image.fromarray(plane.astype(bool))
+
+
+def generate_bit_image(path, bit: int) -> Image.Image:
+    return plane_to_image(bit_plane(load_pixels(path), bit))
+
+
+def pack_bit_planes(arr: np.ndarray, bits: int) -> np.ndarray:
+    # Плоскости 0..bits-1, упакованные по 8 пикселей в байт (старший бит - левый пиксель),
+    # форма (bits, h, ceil(w / 8)) - этот же формат принимает QImage.Format_Mono
+    return np.stack([np.packbits((arr >> bit) & 1, axis=1) for bit in range(bits)])
+
+
+class PlaneSet:
+    # Все битовые плоскости изображения и уменьшенные копии (пирамида) для отображения.
+    # Уровень пирамиды - прореживание предыдущего в 2 раза, пока сторона больше display_side.
+    def __init__(self, pixels: np.ndarray, bits: int = 8, display_side: int = 300):
+        self.bits = min(bits, bit_depth(pixels))
+        self.levels = [(pixels.shape, pack_bit_planes(pixels, self.bits))]
+        level = pixels
+        while max(level.shape) > display_side:
+            level = level[::2, ::2]
+            self.levels.append((level.shape, pack_bit_planes(level, self.bits)))
+
+    @property
+    def shape(self):
+        return self.levels[0][0]
+
+    def plane(self, bit: int) -> np.ndarray:
+        # Плоскость полного разрешения (0/1)
+        (height, width), packed = self.levels[0]
+        return np.unpackbits(packed[bit], axis=1, count=width)
+
+    def display_plane(self, bit: int, side: int = 300):
+        # Наименьший уровень, который еще не меньше side: -> ((h, w), упакованная плоскость)
+        for shape, packed in reversed(self.levels):
+            if max(shape) >= side:
+                return shape, packed[bit]
+        shape, packed = self.levels[0]
+        return shape, packed[bit]
+
+
+class PlaneCache:
+    # LRU-кэш PlaneSet по (путь, время изменения файла)
+    def __init__(self, maxsize: int = 8):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+
+    @staticmethod
+    def key(path):
+        return os.path.abspath(path), os.stat(path).st_mtime_ns
+
+    def get(self, key):
+        plane_set = self._items.get(key)
+        if plane_set is not None:
+            self._items.move_to_end(key)
+        return plane_set
+
+    def put(self, key, plane_set: PlaneSet):
+        self._items[key] = plane_set
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Визуальная атака: сохранение битовых плоскостей изображений")
+    parser.add_argument("images", nargs="+", help="пути к изображениям")
+    parser.add_argument("-o", "--output", default=".", help="папка для сохранения")
+    parser.add_argument("-b", "--bits", type=int, nargs="*", help="номера битов (по умолчанию все)")
+    parser.add_argument("--tiled", action="store_true",
+                        help="потоковый режим для больших raw PGM (P5) и несжатых BMP")
+    parser.add_argument("--tile-rows", type=int, default=DEFAULT_TILE_ROWS, help="высота полосы в потоковом режиме")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output, exist_ok=True)
+    for path in args.images:
+        if args.tiled:
+            for output_path in write_bit_planes_tiled(path, args.output, args.bits or None, args.tile_rows):
+                print(output_path)
+            continue
+
+        planes = all_bit_planes(load_pixels(path))
+        bits = args.bits if args.bits else range(len(planes))
+        name = os.path.splitext(os.path.basename(path))[0]
+        for bit in bits:
+            output_path = os.path.join(args.output, f"{name}_bit_{bit}.bmp")
+            plane_to_image(planes[bit]).save(output_path, "BMP")
+            print(output_path)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+import functools
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+# Постоянный кэш емкости контейнеров на диске.
+# Ключ - хэш содержимого пикселей, имени и версии алгоритма и (если емкость зависит от
+# встраиваемого текста) хэша этого текста. Записи - небольшие JSON-файлы (каждый занимает
+# блок файловой системы), поэтому размер кэша ограничивается числом записей: сверх max_entries
+# удаляются давно не использованные. Каталог можно задать переменной STEGO_CACHE_DIR.
+
+DEFAULT_DIR = os.path.join(os.path.expanduser("~"), ".cache", "steganography", "capacity")
+DEFAULT_MAX_ENTRIES = 4096
+# каталог просматривается для вытеснения при первой записи процесса и далее раз в EVICT_EVERY записей
+EVICT_EVERY = 64
+
+_puts = 0
+
+
+@functools.lru_cache(maxsize=4)
+def payload_digest(payload: str) -> str:
+    return hashlib.sha256(payload.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+class CapacityCache:
+    def __init__(self, directory=None, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.directory = directory or os.environ.get("STEGO_CACHE_DIR") or DEFAULT_DIR
+        self.max_entries = max_entries
+
+    @staticmethod
+    def key(pixels: np.ndarray, algorithm: str, version: int, *extra) -> str:
+        h = hashlib.sha256()
+        h.update(f"{algorithm}:{version}:{pixels.dtype.str}:{pixels.shape}".encode())
+        h.update(np.ascontiguousarray(pixels).data)
+        for part in extra:
+            h.update(b"\0" + str(part).encode())
+        return h.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".json")
+
+    def get(self, key: str):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        try:
+            # время изменения служит отметкой последнего использования для вытеснения
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def put(self, key: str, entry: dict):
+        global _puts
+        os.makedirs(self.directory, exist_ok=True)
+        # запись через временный файл: кэш могут одновременно заполнять несколько процессов
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, self._path(key))
+        _puts += 1
+        if (_puts - 1) % EVICT_EVERY == 0:
+            self.evict()
+
+    def evict(self):
+        with os.scandir(self.directory) as it:
+            entries = [item for item in it if item.name.endswith(".json")]
+        if len(entries) <= self.max_entries:
+            return
+        stamped = []
+        for item in entries:
+            try:
+                stamped.append((item.stat().st_mtime, item.path))
+            except OSError:
+                pass
+        stamped.sort()
+        for _, path in stamped[:len(stamped) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def cached_capacity(pixels: np.ndarray, algorithm: str, version: int, payload: str, compute, cache=None) -> int:
+    # Емкость контейнера для payload из кэша, иначе compute() с сохранением результата
+    cache = cache or CapacityCache()
+    key = cache.key(pixels, algorithm, version, payload_digest(payload))
+    entry = cache.get(key)
+    if entry is not None:
+        return entry["capacity"]
+    capacity = int(compute())
+    try:
+        cache.put(key, {"capacity": capacity})
+    except OSError:
+        # кэш - только ускорение, недоступный каталог не должен мешать встраиванию
+        pass
+    return capacity
@@ -0,0 +1,89 @@
+import numpy as np
+
+# Общий кодек полезной нагрузки для всех встраивателей.
+# Текст кодируется в UTF-8, байты раскладываются в биты (старший бит байта первым)
+# через np.unpackbits и собираются обратно np.packbits - без промежуточных строк из '0'/'1'.
+# Биты группируются в пары (lab3) или в поля переменной ширины (ak бит, lab4).
+
+
+def encode_text(text: str) -> bytes:
+    # surrogatepass: текст из файла или поля ввода с одиночными суррогатами не должен ронять встраивание
+    return text.encode("utf-8", "surrogatepass")
+
+
+def decode_text(data: bytes, errors: str = "replace") -> str:
+    return data.decode("utf-8", errors)
+
+
+def bytes_to_bits(data: bytes) -> np.ndarray:
+    return np.unpackbits(np.frombuffer(data, dtype=np.uint8))
+
+
+def text_to_bits(text: str, terminator: bool = False) -> np.ndarray:
+    # terminator - завершающий нулевой байт (в UTF-8 не встречается внутри символов)
+    data = encode_text(text)
+    return bytes_to_bits(data + b"\x00" if terminator else data)
+
+
+def bits_to_bytes(bits: np.ndarray) -> bytes:
+    # Неполный последний байт отбрасывается
+    whole = len(bits) // 8 * 8
+    return np.packbits(np.asarray(bits[:whole], dtype=np.uint8)).tobytes()
+
+
+def bits_to_text(bits: np.ndarray, errors: str = "replace") -> str:
+    return decode_text(bits_to_bytes(bits), errors)
+
+
+def utf8_prefix(data: bytes, size: int) -> bytes:
+    # Первые size байт без обрезанного посередине символа
+    if size >= len(data):
+        return data
+    end = size
+    # продолжения многобайтового символа имеют вид 10xxxxxx
+    while end > 0 and data[end] & 0xC0 == 0x80:
+        end -= 1
+    return data[:end]
+
+
+def fill_prefix(text: str, capacity_bits: int, percentage) -> tuple:
+    # Начало текста для заполнения percentage процентов емкости:
+    # -> (число бит заполнения, байты UTF-8 в целых символах, не длиннее этого числа бит)
+    target_bits = int(capacity_bits * (int(percentage) / 100))
+    return target_bits, utf8_prefix(encode_text(text), target_bits // 8)
+
+
+def to_pairs(bits: np.ndarray) -> np.ndarray:
+    # Группы по 2 бита; при нечетной длине последняя группа - одиночный бит
+    bits = np.asarray(bits, dtype=np.uint8)
+    pairs = bits[:len(bits) // 2 * 2:2] * 2 + bits[1:len(bits) // 2 * 2:2]
+    if len(bits) % 2:
+        pairs = np.append(pairs, bits[-1])
+    return pairs.astype(np.uint8)
+
+
+def from_pairs(pairs: np.ndarray) -> np.ndarray:
+    # Обратно к to_pairs для полных пар
+    bits = np.empty((len(pairs), 2), dtype=np.uint8)
+    bits[:, 0] = pairs >> 1
+    bits[:, 1] = pairs & 1
+    return bits.reshape(-1)
+
+
+def read_fields(bits: np.ndarray, widths: np.ndarray) -> np.ndarray:
+    # Разбивка потока бит на подряд идущие поля заданной ширины -> значения полей
+    if not len(widths):
+        return np.zeros(0, dtype=int)
+    ends = np.cumsum(widths)
+    shifts = np.repeat(ends, widths) - 1 - np.arange(ends[-1])
+    weighted = bits[:ends[-1]].astype(int) << shifts
+    return np.add.reduceat(weighted, ends - widths)
+
+
+def write_fields(values: np.ndarray, widths: np.ndarray) -> np.ndarray:
+    # Обратно к read_fields: значения полей -> поток бит (старший бит поля первым)
+    if not len(widths):
+        return np.zeros(0, dtype=np.uint8)
+    ends = np.cumsum(widths)
+    shifts = np.repeat(ends, widths) - 1 - np.arange(ends[-1])
+    return ((np.repeat(values, widths) >> shifts) & 1).astype(np.uint8)
@@ -0,0 +1,37 @@
+import sys
+
+import numpy as np
+from PyQt5.QtGui import QImage, QPixmap, qRgb
+
+
+# QImage не владеет памятью переданного буфера, поэтому массив сохраняется
+# в атрибуте изображения и живет столько же, сколько само изображение.
+
+def plane_to_qimage(plane: np.ndarray) -> QImage:
+    # Битовая плоскость (0/1) -> Format_Mono, 1 бит на пиксель
+    return packed_plane_to_qimage(np.packbits(plane.astype(bool), axis=1), plane.shape[1])
+
+
+def packed_plane_to_qimage(packed: np.ndarray, width: int) -> QImage:
+    # Уже упакованная плоскость (np.packbits по строкам) -> Format_Mono без копирования
+    buffer = np.ascontiguousarray(packed)
+    image = QImage(buffer.data, width, buffer.shape[0], buffer.strides[0], QImage.Format_Mono)
+    image.setColorTable([qRgb(0, 0, 0), qRgb(255, 255, 255)])
+    image._buffer = buffer
+    return image
+
+
+def scaled_pixmap(image: QImage, width: int = 300, height: int = 300) -> QPixmap:
+    return QPixmap.fromImage(image).scaled(width, height, aspectRatioMode=True)
+
+
+def rgb_view(image: QImage) -> np.ndarray:
+    # Представление (высота, ширина, 3) в порядке RGB над буфером 32-битного QImage
+    # (Format_RGB32 / Format_ARGB32) без копирования; запись меняет само изображение.
+    # Представление не удерживает QImage - изображение должно жить, пока используется массив.
+    ptr = image.bits()
+    ptr.setsize(image.byteCount())
+    words = np.frombuffer(ptr, dtype=np.uint8).reshape(image.height(), image.bytesPerLine())
+    pixels = words[:, :image.width() * 4].reshape(image.height(), image.width(), 4)
+    # пиксель хранится как 0xAARRGGBB в порядке байтов платформы
+    return pixels[..., 2::-1] if sys.byteorder == "little" else pixels[..., 1:]
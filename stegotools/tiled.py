@@ -0,0 +1,152 @@
+import os
+import struct
+
+import numpy as np
+
+# Потоковая визуальная атака для очень больших изображений.
+# Пиксели raw PGM (P5) и несжатого BMP отображаются в память (np.memmap) и
+# обрабатываются полосами по tile_rows строк, поэтому расход памяти ограничен
+# размером полосы и не зависит от размера изображения.
+
+DEFAULT_TILE_ROWS = 256
+
+
+def _read_pgm_header(path):
+    with open(path, "rb") as f:
+        head = f.read(4096)
+    if head[:2] != b"P5":
+        raise ValueError(f"{path}: ожидается raw PGM (P5)")
+
+    tokens = []
+    pos = 2
+    while len(tokens) < 3:
+        if pos >= len(head):
+            raise ValueError(f"{path}: поврежденный заголовок PGM")
+        ch = head[pos:pos + 1]
+        if ch == b"#":
+            pos = head.find(b"\n", pos)
+            if pos < 0:
+                raise ValueError(f"{path}: поврежденный заголовок PGM")
+        elif ch.isspace():
+            pos += 1
+        else:
+            end = pos
+            while end < len(head) and not head[end:end + 1].isspace() and head[end:end + 1] != b"#":
+                end += 1
+            tokens.append(int(head[pos:end]))
+            pos = end
+    # после maxval ровно один пробельный символ, затем данные
+    width, height, maxval = tokens
+    return width, height, maxval, pos + 1
+
+
+def map_pgm(path):
+    # -> (массив высота x ширина в памяти файла, число битовых плоскостей)
+    width, height, maxval, offset = _read_pgm_header(path)
+    if maxval < 256:
+        dtype, bits = np.uint8, 8
+    else:
+        dtype, bits = np.dtype(">u2"), 16
+    pixels = np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(height, width))
+    return pixels, bits
+
+
+def map_bmp(path):
+    # -> (массив высота x ширина [x каналы] сверху вниз, число битовых плоскостей)
+    with open(path, "rb") as f:
+        header = f.read(54)
+    if len(header) < 54 or header[:2] != b"BM":
+        raise ValueError(f"{path}: не BMP-файл")
+
+    offset, = struct.unpack_from("<I", header, 10)
+    width, height, _, bpp, compression = struct.unpack_from("<iiHHI", header, 18)
+    if compression != 0 or bpp not in (8, 24, 32):
+        raise ValueError(f"{path}: поддерживаются только несжатые 8/24/32-битные BMP")
+
+    rows = abs(height)
+    stride = (bpp * width + 31) // 32 * 4
+    raw = np.memmap(path, dtype=np.uint8, mode="r", offset=offset, shape=(rows, stride))
+    if bpp == 8:
+        pixels = raw[:, :width]
+    else:
+        channels = bpp // 8
+        pixels = raw[:, :width * channels].reshape(rows, width, channels)
+    if height > 0:
+        # строки BMP хранятся снизу вверх
+        pixels = pixels[::-1]
+    return pixels, 8
+
+
+def map_image(path):
+    with open(path, "rb") as f:
+        magic = f.read(2)
+    if magic == b"P5":
+        return map_pgm(path)
+    if magic == b"BM":
+        return map_bmp(path)
+    raise ValueError(f"{path}: потоковый режим поддерживает только raw PGM (P5) и несжатый BMP")
+
+
+def _to_gray(tile: np.ndarray) -> np.ndarray:
+    # BGR(A) -> яркость по той же формуле с фиксированной точкой, что и Image.convert("L")
+    if tile.ndim == 2:
+        return tile
+    b = tile[..., 0].astype(np.uint32)
+    g = tile[..., 1].astype(np.uint32)
+    r = tile[..., 2].astype(np.uint32)
+    return ((r * 19595 + g * 38470 + b * 7471 + 0x8000) >> 16).astype(np.uint8)
+
+
+def iter_tiles(pixels: np.ndarray, tile_rows: int = DEFAULT_TILE_ROWS):
+    # Полосы (номер первой строки, массив яркостей); с диска читаются только строки полосы
+    for row in range(0, pixels.shape[0], tile_rows):
+        yield row, _to_gray(np.asarray(pixels[row:row + tile_rows]))
+
+
+def _mono_bmp_header(width: int, height: int) -> bytes:
+    # 1-битный BMP с палитрой черный/белый, строки записываются сверху вниз (отрицательная высота)
+    stride = (width + 31) // 32 * 4
+    offset = 14 + 40 + 8
+    size = offset + stride * height
+    return (
+        struct.pack("<2sIHHI", b"BM", size & 0xFFFFFFFF, 0, 0, offset)
+        + struct.pack("<IiiHHIIiiII", 40, width, -height, 1, 1, 0, stride * height, 2835, 2835, 2, 2)
+        + bytes((0, 0, 0, 0, 255, 255, 255, 0))
+    )
+
+
+def _pack_mono_rows(plane: np.ndarray) -> bytes:
+    packed = np.packbits(plane, axis=1)
+    stride = (plane.shape[1] + 31) // 32 * 4
+    if packed.shape[1] < stride:
+        packed = np.pad(packed, ((0, 0), (0, stride - packed.shape[1])))
+    return packed.tobytes()
+
+
+def write_bit_planes_tiled(path, output_dir, bits=None, tile_rows: int = DEFAULT_TILE_ROWS) -> list:
+    # Сохраняет выбранные битовые плоскости в 1-битные BMP за один проход по изображению
+    pixels, depth = map_image(path)
+    height, width = pixels.shape[:2]
+    if bits is None:
+        bits = range(depth)
+    bits = list(bits)
+    for bit in bits:
+        if not 0 <= bit < depth:
+            raise ValueError(f"{path}: бит {bit} вне диапазона 0..{depth - 1}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    name = os.path.splitext(os.path.basename(path))[0]
+    output_paths = [os.path.join(output_dir, f"{name}_bit_{bit}.bmp") for bit in bits]
+    outputs = [open(output_path, "wb") for output_path in output_paths]
+    try:
+        header = _mono_bmp_header(width, height)
+        for out in outputs:
+            out.write(header)
+        for _, tile in iter_tiles(pixels, tile_rows):
+            for bit, out in zip(bits, outputs):
+                out.write(_pack_mono_rows(((tile >> bit) & 1).astype(np.uint8)))
+    finally:
+        for out in outputs:
+            out.close()
+    return output_paths
+